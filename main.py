@@ -1,64 +1,182 @@
-import logging
+"""
+P4 pipeline entry point.
+
+    python main.py                      full demo (phases 1-4)
+    python main.py load [--map M ...]   load / validate inputs
+    python main.py map [--force] [--incremental] [--backend NAME] [--weighted]
+    python main.py generate MAP [--x X --y Y | --biome CODE] [--seed N]
+    python main.py export MAP --out DIR [--seed N] [--no-compress] [--workers N | --count N]
+
+Only argparse / json / logging and p4_config are imported at module level.
+Every command imports the loaders, mapper, embedder and generator modules
+it needs inside its own function, so e.g. `generate` never pays for the
+embedding stack.
+"""
+import argparse
 import json
+import logging
+import sys
+from pathlib import Path
 
+from p4_config.constants import DEFAULT_RANDOM_SEED
 from p4_config.paths import get_data_paths
-from p4_loaders.archetype_loader import ArchetypeLoader
-from p4_loaders.trope_loader import TropeLoader
-from p4_loaders.terrain_loader import TerrainLoader
-
-from p4_embeddings.embedder import MiniLMEmbedder
-from p4_mappers.archetype_mapper import ArchetypeMapper
-from p4_exporters.mapping_exporter import MappingExporter
 
-from p4_rules.biome_registry import get_biome
-from p4_rules.archetype_pools import ARCHETYPE_POOLS
-from p4_rules.biome_rules import BIOME_OCEAN_MODIFIERS
-
-from p4_generator.npc_generator import generate_npc
-from p4_utils.terrain_utils import find_cell_with_biome
+MAPPING_PATH = "config_archetypes_mapped.json"
+DEMO_MAPS = ("Tokyo_MegaCity.json", "Yakutsk_FrozenTundra.json")
 
 
 # ---------------------------------------------------------------------
 # Logging
 # ---------------------------------------------------------------------
-def setup_logging():
+def setup_logging(level: int = logging.INFO):
     logging.basicConfig(
-        level=logging.INFO,
+        level=level,
         format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
     )
 
 
+# ---------------------------------------------------------------------
+# Phase 1: Inputs
+# ---------------------------------------------------------------------
+def load_inputs(paths):
+    from p4_loaders.archetype_loader import ArchetypeLoader
+    from p4_loaders.trope_loader import TropeLoader
+
+    parents = ArchetypeLoader().load(paths.parent_archetypes_path)
+    tropes = TropeLoader().load(paths.tropes_child_path)
+    return parents, tropes
+
+
+def load_phase_1(paths, map_paths):
+    """
+    Parents, tropes and maps loaded concurrently (see ConcurrentLoader).
+    """
+    from p4_loaders.concurrent_loader import ConcurrentLoader
+
+    return ConcurrentLoader(cache_dir=paths.terrain_cache_dir).load_all(
+        paths.parent_archetypes_path,
+        paths.tropes_child_path,
+        map_paths,
+    )
+
+
+def print_load_reports(inputs) -> None:
+    for r in inputs.reports:
+        status = "ok" if r.ok else f"FAILED ({r.error})"
+        print(f"  {r.kind:<8} {r.path.name:<40} {r.seconds * 1000:8.1f} ms  {r.executor:<7} {status}")
+    print(f"  total wall time {inputs.seconds * 1000:.1f} ms")
+
+
+def load_terrain(path):
+    from p4_loaders.terrain_loader import TerrainLoader
+
+    return TerrainLoader(cache_dir=get_data_paths().terrain_cache_dir).load_map(path)
+
+
+def load_mappings(mapping_path: str = MAPPING_PATH):
+    """
+    Reads the mapping artifact; None if it has not been built yet.
+    """
+    try:
+        with open(mapping_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def resolve_map_path(name: str, paths) -> Path:
+    """
+    Accepts a file path or a map name inside the terrain folder
+    ("Tokyo_MegaCity" / "Tokyo_MegaCity.json").
+    """
+    p = Path(name)
+    if p.exists():
+        return p
+    p = paths.terrain_dir / name
+    if p.suffix != ".json":
+        p = p.with_name(p.name + ".json")
+    return p
+
+
 # ---------------------------------------------------------------------
 # Phase 2: Semantic Mapping
 # ---------------------------------------------------------------------
-def run_phase_2(parents, tropes, force_remap: bool = False):
+def run_phase_2(
+    parents,
+    tropes,
+    force_remap: bool = False,
+    incremental: bool = False,
+    backend: str = "minilm",
+    weighted: bool = False,
+):
     """
     Runs semantic mapping or loads existing mapping artifact.
+
+    With incremental=True an existing artifact is diffed against the
+    fingerprint stored next to it and only new / changed rows are re-mapped.
+    `backend` picks the embedder (see p4_embeddings.backends); weighted=True
+    blends per-field child embeddings (CHILD_TEXT_WEIGHTS) instead of
+    embedding the joined text.
     """
-    mapping_path = "config_archetypes_mapped.json"
+    mapping_path = MAPPING_PATH
 
     if not force_remap:
-        try:
-            with open(mapping_path, "r", encoding="utf-8") as f:
-                mappings = json.load(f)
+        mappings = load_mappings(mapping_path)
+
+        if mappings is not None and not incremental:
             print(f"\nLoaded existing archetype mapping ({len(mappings)} rows)")
             return mappings
-        except FileNotFoundError:
-            pass
+
+        if mappings is not None:
+            from p4_exporters.mapping_exporter import MappingExporter
+            from p4_mappers.mapping_fingerprint import MappingFingerprint, fingerprint_path
+            from p4_mappers.mapping_scores import MappingScores, scores_path
+
+            previous = MappingFingerprint.load(fingerprint_path(mapping_path))
+            if previous is None:
+                print("\nNo mapping fingerprint found; running full remap")
+            else:
+                print("\n=== PHASE 2: INCREMENTAL MAPPING ===")
+                mapper = _phase_2_mapper(backend, weighted)
+                previous_rows = mappings
+                mappings, fingerprint, scores, stats = mapper.remap_incremental(
+                    parents=parents,
+                    children=tropes,
+                    previous_rows=previous_rows,
+                    previous=previous,
+                    previous_scores=MappingScores.load(scores_path(mapping_path)),
+                )
+                print(
+                    f"Re-scored {stats['rescored']} rows, "
+                    f"checked {stats['checked']}, removed {stats['removed']}"
+                )
+                # review flags can change with the threshold alone
+                if mappings != previous_rows or fingerprint != previous:
+                    MappingExporter().export(
+                        mappings=mappings,
+                        output_path=mapping_path,
+                        fingerprint=fingerprint,
+                        scores=scores,
+                    )
+                return mappings
+
+    from p4_exporters.mapping_exporter import MappingExporter
 
     print("\n=== PHASE 2: SEMANTIC MAPPING ===")
 
-    embedder = MiniLMEmbedder()
-    mapper = ArchetypeMapper(embedder)
+    mapper = _phase_2_mapper(backend, weighted)
 
-    mappings = mapper.map_children_to_parents(
+    scores = mapper.score_children(
         parents=parents,
         children=tropes,
     )
+    mappings = scores.to_rows()
 
     MappingExporter().export(
         mappings=mappings,
         output_path=mapping_path,
+        fingerprint=mapper.fingerprint(parents, tropes),
+        scores=scores,
     )
 
     low_conf = sum(1 for m in mappings if m["review_needed"])
@@ -67,11 +185,206 @@ def run_phase_2(parents, tropes, force_remap: bool = False):
     return mappings
 
 
+def _phase_2_embedder(backend: str = "minilm"):
+    from p4_embeddings.backends import create_embedder
+    from p4_embeddings.embedding_cache import CachedEmbedder
+
+    return CachedEmbedder(create_embedder(backend), get_data_paths().embedding_cache_dir)
+
+
+def _phase_2_mapper(backend: str = "minilm", weighted: bool = False):
+    from p4_mappers.archetype_mapper import ArchetypeMapper
+    from p4_mappers.mapping_config import CHILD_TEXT_WEIGHTS
+
+    return ArchetypeMapper(_phase_2_embedder(backend), field_weights=CHILD_TEXT_WEIGHTS if weighted else None)
+
+
 # ---------------------------------------------------------------------
-# Main
+# Commands
 # ---------------------------------------------------------------------
-def main():
-    setup_logging()
+def cmd_load(args) -> int:
+    """
+    Loads every input and cross-checks them; exit code 1 on problems.
+    """
+    from p4_rules.rule_table import validate_biome_rules
+
+    paths = get_data_paths()
+    problems = []
+
+    map_names = args.map or [
+        name for name in DEMO_MAPS if (paths.terrain_dir / name).exists()
+    ]
+
+    print("\n=== PHASE 1: LOAD INPUTS ===")
+    inputs = load_phase_1(paths, [resolve_map_path(name, paths) for name in map_names])
+    parents, tropes = inputs.parents, inputs.tropes
+    print_load_reports(inputs)
+    print(f"Loaded parent archetypes: {len(parents)}")
+    print(f"Loaded child tropes:      {len(tropes)}")
+    for terrain in inputs.maps:
+        print(f"Loaded map {terrain.name}: {len(terrain.cells)} cells")
+    for r in inputs.reports:
+        if not r.ok:
+            problems.append(f"terrain {r.path.name}: {r.error}")
+
+    parent_ids = {p.id for p in parents}
+    trope_ids = {t.id for t in tropes}
+    if len(parent_ids) != len(parents):
+        problems.append(f"{len(parents) - len(parent_ids)} duplicate parent ids")
+    if len(trope_ids) != len(tropes):
+        problems.append(f"{len(tropes) - len(trope_ids)} duplicate trope ids")
+
+    problems.extend(validate_biome_rules(parent_ids=parent_ids))
+
+    mappings = load_mappings()
+    if mappings is None:
+        print(f"Mapping artifact:         missing ({MAPPING_PATH})")
+    else:
+        print(f"Mapping artifact:         {len(mappings)} rows")
+        mapped = {m["child_id"] for m in mappings}
+        unknown_children = mapped - trope_ids
+        unknown_parents = {m["resolved_parent_id"] for m in mappings} - parent_ids
+        if unknown_children:
+            problems.append(f"{len(unknown_children)} mapping rows reference unknown tropes")
+        if unknown_parents:
+            problems.append(f"mapping references unknown parents: {sorted(unknown_parents)}")
+        if trope_ids - mapped:
+            print(f"  {len(trope_ids - mapped)} tropes are not mapped yet")
+
+    for p in problems:
+        print(f"  PROBLEM: {p}")
+    print("\n✅ Phase 1 OK" if not problems else f"\n❌ {len(problems)} problem(s)")
+    return 1 if problems else 0
+
+
+def cmd_map(args) -> int:
+    paths = get_data_paths()
+    parents, tropes = load_inputs(paths)
+    try:
+        run_phase_2(
+            parents,
+            tropes,
+            force_remap=args.force,
+            incremental=args.incremental,
+            backend=args.backend,
+            weighted=args.weighted,
+        )
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def _generation_context(paths):
+    mappings = load_mappings()
+    if mappings is None:
+        print(f"error: {MAPPING_PATH} not found; run `python main.py map` first", file=sys.stderr)
+        return None
+    parents, tropes = load_inputs(paths)
+    return {p.id: p for p in parents}, tropes, mappings
+
+
+def cmd_generate(args) -> int:
+    from p4_generator.npc_generator import generate_npc
+    from p4_utils.terrain_utils import find_cell_with_biome
+
+    paths = get_data_paths()
+    context = _generation_context(paths)
+    if context is None:
+        return 2
+    parents_by_id, tropes, mappings = context
+
+    terrain = load_terrain(resolve_map_path(args.map, paths))
+
+    if args.x is not None and args.y is not None:
+        xy = (args.x, args.y)
+    elif args.biome is not None:
+        xy = find_cell_with_biome(terrain, args.biome)
+        if xy is None:
+            print(f"error: no cell with biome {args.biome} in {terrain.name}", file=sys.stderr)
+            return 1
+    else:
+        xs, ys = terrain.cell_coords()
+        if len(xs) == 0:
+            print(f"error: {terrain.name} has no cells", file=sys.stderr)
+            return 1
+        xy = (int(xs[0]), int(ys[0]))
+
+    npc = generate_npc(
+        x=xy[0],
+        y=xy[1],
+        terrain_map=terrain,
+        parents_by_id=parents_by_id,
+        tropes=tropes,
+        mapping_rows=mappings,
+        seed=args.seed,
+        per_cell_seed=args.per_cell_seed,
+    )
+    print(json.dumps(npc, indent=2))
+    return 0
+
+
+def cmd_export(args) -> int:
+    from p4_exporters.npc_exporter import NpcExporter
+    from p4_generator.identity import NameRegistry
+    from p4_generator.population import iter_npcs
+
+    paths = get_data_paths()
+    context = _generation_context(paths)
+    if context is None:
+        return 2
+    parents_by_id, tropes, mappings = context
+
+    map_path = resolve_map_path(args.map, paths)
+    terrain = load_terrain(map_path)
+
+    if args.count is not None:
+        from p4_generator.placement import plan_population
+        from p4_generator.population import PopulationEngine
+
+        # placed NPCs are always seeded per cell and index
+        plan = plan_population(terrain, args.count, seed=args.seed)
+        print(f"Placing {plan.total} NPCs on {len(plan.xs)} cells of {terrain.name}")
+        engine = PopulationEngine(parents_by_id, tropes, mappings, confidence_weighted=args.confidence_weighted)
+        npcs = engine.iter_placed(terrain, plan, seed=args.seed)
+    elif args.workers <= 1:
+        npcs = iter_npcs(
+            terrain, parents_by_id, tropes, mappings,
+            seed=args.seed, per_cell_seed=args.per_cell_seed,
+            confidence_weighted=args.confidence_weighted,
+        )
+
+    # names are unique across the whole export, shards included
+    expected = plan.total if args.count is not None else int(terrain.present.sum())
+    names = NameRegistry(capacity=max(expected, 1))
+
+    with NpcExporter(args.out, terrain.name, compress=not args.no_compress) as exporter:
+        if args.count is None and args.workers > 1:
+            from p4_generator.parallel import generate_parallel
+
+            # workers return encoded lines; only names are checked here
+            shards = generate_parallel(
+                [map_path], parents_by_id, tropes, mappings,
+                seed=args.seed, per_cell_seed=args.per_cell_seed, workers=args.workers,
+                store_dir=paths.cache_dir / "store", encoded=True,
+                confidence_weighted=args.confidence_weighted,
+            )
+            for _, shard in shards:
+                shard.dedupe(names)
+                shard.write_to(exporter)
+        else:
+            exporter.write_many(names.dedupe(npcs))
+    print(f"Exported {exporter.count} NPCs from {terrain.name} to {exporter.dir}")
+    return 0
+
+
+def cmd_demo(args) -> int:
+    from p4_generator.npc_generator import generate_npc
+    from p4_rules.archetype_pools import ARCHETYPE_POOLS
+    from p4_rules.biome_registry import get_biome
+    from p4_rules.biome_rules import BIOME_OCEAN_MODIFIERS
+    from p4_utils.terrain_utils import find_cell_with_biome
+
     paths = get_data_paths()
 
     # -------------------------------------------------
@@ -79,18 +392,18 @@ def main():
     # -------------------------------------------------
     print("\n=== PHASE 1: LOAD INPUTS ===")
 
-    parents = ArchetypeLoader().load(paths.parent_archetypes_path)
-    tropes = TropeLoader().load(paths.tropes_child_path)
+    inputs = load_phase_1(paths, [paths.terrain_dir / name for name in DEMO_MAPS])
+    failed = [r.path.name for r in inputs.reports if not r.ok]
+    if failed:
+        raise RuntimeError(f"Failed to load demo maps: {failed}")
+    parents, tropes = inputs.parents, inputs.tropes
+    tokyo, yakutsk = inputs.maps
 
     print(f"Loaded parent archetypes: {len(parents)}")
     print(f"Loaded child tropes:      {len(tropes)}")
 
     parents_by_id = {p.id: p for p in parents}
 
-    terrain_loader = TerrainLoader()
-    tokyo = terrain_loader.load_map(paths.terrain_dir / "Tokyo_MegaCity.json")
-    yakutsk = terrain_loader.load_map(paths.terrain_dir / "Yakutsk_FrozenTundra.json")
-
     print(f"Loaded Tokyo map:   {len(tokyo.cells)} cells")
     print(f"Loaded Yakutsk map: {len(yakutsk.cells)} cells")
 
@@ -150,7 +463,71 @@ def main():
 
     print("\nYAKUTSK NPC SAMPLE:\n")
     print(json.dumps(yakutsk_npc, indent=2))
+    return 0
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description="P4 NPC generation pipeline")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("load", aliases=["validate"], help="load and cross-check inputs")
+    p.add_argument("--map", action="append", help="terrain map path or name (repeatable)")
+    p.set_defaults(func=cmd_load)
+
+    p = sub.add_parser("map", help="build or update the archetype mapping artifact")
+    p.add_argument("--force", action="store_true", help="remap everything")
+    p.add_argument("--incremental", action="store_true", help="only remap changed rows")
+    p.add_argument("--backend", default="minilm", help="embedder backend (minilm, hashing)")
+    p.add_argument("--weighted", action="store_true", help="blend per-field child embeddings")
+    p.set_defaults(func=cmd_map)
+
+    p = sub.add_parser("generate", help="generate one NPC")
+    p.add_argument("map", help="terrain map path or name")
+    p.add_argument("--x", type=int)
+    p.add_argument("--y", type=int)
+    p.add_argument("--biome", type=int, help="use the first cell of this biome")
+    p.add_argument("--seed", type=int, default=DEFAULT_RANDOM_SEED)
+    p.add_argument("--per-cell-seed", action="store_true", help="seed each NPC from (seed, map, x, y)")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("export", help="generate and write the population of a map")
+    p.add_argument("map", help="terrain map path or name")
+    p.add_argument("--out", required=True, help="archive directory (one subfolder per map)")
+    p.add_argument("--seed", type=int, default=DEFAULT_RANDOM_SEED)
+    p.add_argument("--per-cell-seed", action="store_true", help="seed each NPC from (seed, map, x, y)")
+    p.add_argument("--no-compress", action="store_true", help="write plain JSONL chunks")
+    p.add_argument("--workers", type=int, default=1, help="generate row shards on N processes")
+    p.add_argument(
+        "--count", type=int,
+        help="place N NPCs by human density instead of one per cell (serial, always seeded per cell)",
+    )
+    p.add_argument(
+        "--confidence-weighted", action="store_true",
+        help="pick tropes in proportion to their mapping confidence instead of uniformly",
+    )
+    p.set_defaults(func=cmd_export)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "count", None) is not None and (args.workers > 1 or args.per_cell_seed):
+        # placed NPCs are generated serially and always seeded per cell and index
+        parser.error("--count cannot be combined with --workers or --per-cell-seed")
+    setup_logging(logging.WARNING if args.quiet else logging.INFO)
+
+    if (getattr(args, "x", None) is None) != (getattr(args, "y", None) is None):
+        print("error: --x and --y must be given together", file=sys.stderr)
+        return 2
+
+    return getattr(args, "func", cmd_demo)(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
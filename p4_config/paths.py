@@ -21,6 +21,18 @@ class DataPaths:
     def terrain_dir(self) -> Path:
         return self.project_root / "Terrain_Test_Suite_JSON_Revised"
 
+    @property
+    def cache_dir(self) -> Path:
+        return self.project_root / ".p4_cache"
+
+    @property
+    def terrain_cache_dir(self) -> Path:
+        return self.cache_dir / "terrain"
+
+    @property
+    def embedding_cache_dir(self) -> Path:
+        return self.cache_dir / "embeddings"
+
     @property
     def parent_archetypes_path(self) -> Path:
         # Prefer attachments copy (client-provided bundle)
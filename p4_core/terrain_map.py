@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Tuple, Optional, Any, Iterator, Mapping
+
+import numpy as np
+
+from p4_core.world_cell import WorldCell
+
+
+# Columnar layout: one dense [y, x] array per attribute.
+# Missing values are NaN for floats and -1 for codes / flags.
+FLOAT_COLUMNS = ("elevation", "roughness", "human_density", "movement_cost")
+CODE_COLUMNS = ("biome_code",)
+FLAG_COLUMNS = ("is_water", "buildable")
+TERRAIN_COLUMNS = ("elevation", "roughness", "is_water", "biome_code", "human_density", "movement_cost", "buildable")
+
+GEO_FIELDS = ("elevation", "roughness", "is_water", "biome_code", "human_density")
+HEURISTIC_FIELDS = ("movement_cost", "buildable")
+
+COLUMN_DTYPES = {
+    **{c: np.float64 for c in FLOAT_COLUMNS},
+    "biome_code": np.int16,
+    **{c: np.int8 for c in FLAG_COLUMNS},
+}
+
+
+@dataclass(frozen=True)
+class TerrainMap:
+    """
+    Columnar terrain grid.
+
+    Every attribute lives in a dense 2-D array indexed [y - y0, x - x0];
+    `present` marks which cells exist in the source file. get_cell() and
+    `cells` build WorldCell views on demand for code that works per cell.
+
+    `geo_data` / `game_heuristics` keys that have no column are kept in
+    the sparse `extras` dict, (x, y) -> {"geo_data": {...},
+    "game_heuristics": {...}}, and merged back in by get_cell().
+    """
+    name: str
+    meta: Dict[str, Any]
+    origin: Tuple[int, int]
+    present: np.ndarray
+    columns: Dict[str, np.ndarray]
+    extras: Dict[Tuple[int, int], Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+
+    # -------------------------------------------------
+    # Shape / indexing
+    # -------------------------------------------------
+    @property
+    def width(self) -> int:
+        return int(self.present.shape[1])
+
+    @property
+    def height(self) -> int:
+        return int(self.present.shape[0])
+
+    def _index(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        r = y - self.origin[1]
+        c = x - self.origin[0]
+        if 0 <= r < self.height and 0 <= c < self.width and self.present[r, c]:
+            return r, c
+        return None
+
+    def has_cell(self, x: int, y: int) -> bool:
+        return self._index(x, y) is not None
+
+    def cell_coords(self, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (xs, ys) of present cells in row-major order, optionally restricted
+        by a boolean grid mask.
+        """
+        sel = self.present if mask is None else (self.present & mask)
+        rows, cols = np.nonzero(sel)
+        return cols + self.origin[0], rows + self.origin[1]
+
+    # -------------------------------------------------
+    # Columns
+    # -------------------------------------------------
+    @property
+    def elevation(self) -> np.ndarray:
+        return self.columns["elevation"]
+
+    @property
+    def roughness(self) -> np.ndarray:
+        return self.columns["roughness"]
+
+    @property
+    def is_water(self) -> np.ndarray:
+        return self.columns["is_water"]
+
+    @property
+    def biome_code(self) -> np.ndarray:
+        return self.columns["biome_code"]
+
+    @property
+    def human_density(self) -> np.ndarray:
+        return self.columns["human_density"]
+
+    @property
+    def movement_cost(self) -> np.ndarray:
+        return self.columns["movement_cost"]
+
+    @property
+    def buildable(self) -> np.ndarray:
+        return self.columns["buildable"]
+
+    def biome_code_at(self, x: int, y: int) -> Optional[int]:
+        idx = self._index(x, y)
+        if idx is None:
+            return None
+        v = int(self.biome_code[idx])
+        return v if v >= 0 else None
+
+    # -------------------------------------------------
+    # Per-cell views
+    # -------------------------------------------------
+    def get_cell(self, x: int, y: int) -> Optional[WorldCell]:
+        idx = self._index(x, y)
+        if idx is None:
+            return None
+
+        values = {name: self.columns[name][idx] for name in TERRAIN_COLUMNS}
+        geo = _unpack_fields(values, GEO_FIELDS)
+        heur = _unpack_fields(values, HEURISTIC_FIELDS)
+        extra = self.extras.get((x, y))
+        if extra:
+            geo.update(extra.get("geo_data", {}))
+            heur.update(extra.get("game_heuristics", {}))
+        return WorldCell(x=x, y=y, geo_data=geo, game_heuristics=heur or None)
+
+    @property
+    def cells(self) -> "TerrainCells":
+        return TerrainCells(self)
+
+
+class TerrainCells(Mapping):
+    """
+    Read-only (x, y) -> WorldCell mapping over a TerrainMap, in row-major order.
+    """
+
+    def __init__(self, terrain_map: TerrainMap):
+        self._map = terrain_map
+
+    def __getitem__(self, key: Tuple[int, int]) -> WorldCell:
+        cell = self._map.get_cell(*key)
+        if cell is None:
+            raise KeyError(key)
+        return cell
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, tuple) and len(key) == 2 and self._map.has_cell(*key)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        xs, ys = self._map.cell_coords()
+        return zip(xs.tolist(), ys.tolist())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._map.present))
+
+
+def _unpack_fields(values: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for name in fields:
+        v = values[name]
+        if name in FLOAT_COLUMNS:
+            if not np.isnan(v):
+                out[name] = float(v)
+        elif name in FLAG_COLUMNS:
+            if v >= 0:
+                out[name] = bool(v)
+        elif v >= 0:
+            out[name] = int(v)
+    return out
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Optional
+
+from p4_embeddings.base import Embedder
+from p4_embeddings.embedder import MiniLMEmbedder
+from p4_embeddings.hashing_embedder import HashingEmbedder
+
+EMBEDDER_BACKENDS: Dict[str, Callable[..., Embedder]] = {
+    "minilm": MiniLMEmbedder,
+    "hashing": HashingEmbedder,
+}
+
+
+def create_embedder(
+    backend: str = "minilm",
+    fit_texts: Optional[Iterable[str]] = None,
+    **kwargs,
+) -> Embedder:
+    """
+    Builds an embedder by backend name. `fit_texts` lets corpus-aware
+    backends (hashing + IDF) fit their weights first.
+    """
+    if backend not in EMBEDDER_BACKENDS:
+        raise ValueError(f"Unknown embedder backend {backend!r}; choose from {sorted(EMBEDDER_BACKENDS)}")
+
+    if backend == "hashing" and fit_texts is not None:
+        return HashingEmbedder.fit(fit_texts, **kwargs)
+    return EMBEDDER_BACKENDS[backend](**kwargs)
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import List, Protocol, Union, runtime_checkable
+
+import numpy as np
+
+
+@runtime_checkable
+class Embedder(Protocol):
+    """
+    What ArchetypeMapper (and CachedEmbedder) need from an embedding backend.
+
+    model_name must identify the backend *and* its configuration: it keys
+    the embedding cache and the mapping fingerprint.
+    """
+    model_name: str
+    normalize: bool
+
+    def embed(self, texts: Union[str, List[str]]) -> np.ndarray:
+        ...
+
+    def embedding_dim(self) -> int:
+        ...
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from typing import List, Union
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
 
 class MiniLMEmbedder:
@@ -20,7 +19,16 @@ class MiniLMEmbedder:
         self.model_name = model_name
         self.normalize = normalize
         self.batch_size = batch_size
-        self.model = SentenceTransformer(model_name)
+        self._model = None
+
+    @property
+    def model(self):
+        # Loaded on first use so cache hits never pay for torch / the weights.
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
 
     def embed(self, texts: Union[str, List[str]]) -> np.ndarray:
         if isinstance(texts, str):
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from p4_embeddings.base import Embedder
+
+logger = logging.getLogger(__name__)
+
+_KEY_BYTES = 16
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=_KEY_BYTES).digest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, append-only embedding store.
+
+    One namespace per (model_name, normalize). Vectors live in a raw float32
+    matrix (memory-mapped for reads); keys.bin holds the text hash of each
+    row in the same order and meta.json the committed row count, which is
+    written last so an interrupted append is simply ignored.
+    Single writer per namespace.
+    """
+
+    def __init__(self, cache_dir: str | Path, model_name: str, normalize: bool):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name).strip("_")
+        self.dir = Path(cache_dir) / f"{slug}-{'norm' if normalize else 'raw'}"
+        self.model_name = model_name
+        self.normalize = normalize
+
+        self.dim: Optional[int] = None
+        self._count = 0
+        self._rows: Dict[bytes, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._open()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.dir / "vectors.f32"
+
+    @property
+    def _keys_path(self) -> Path:
+        return self.dir / "keys.bin"
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.dir / "meta.json"
+
+    def _open(self) -> None:
+        if not self._meta_path.exists():
+            return
+
+        with self._meta_path.open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model_name") != self.model_name or meta.get("normalize") != self.normalize:
+            logger.warning("Embedding cache %s belongs to another model; ignoring it", self.dir)
+            return
+
+        self.dim = int(meta["dim"])
+        self._count = int(meta["count"])
+
+        keys = self._keys_path.read_bytes()[: self._count * _KEY_BYTES]
+        self._rows = {
+            keys[i * _KEY_BYTES:(i + 1) * _KEY_BYTES]: i
+            for i in range(self._count)
+        }
+        self._matrix = None
+
+    def _vectors(self) -> np.ndarray:
+        if self._matrix is None:
+            if self._count == 0:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r", shape=(self._count, self.dim)
+            )
+        return self._matrix
+
+    # -------------------------------------------------
+    # Lookup / insert
+    # -------------------------------------------------
+    def lookup(self, keys: List[bytes]) -> List[Optional[int]]:
+        return [self._rows.get(k) for k in keys]
+
+    def vectors(self, rows: List[int]) -> np.ndarray:
+        return np.asarray(self._vectors()[rows], dtype=np.float32)
+
+    def add(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(keys) != len(vectors):
+            raise ValueError("keys and vectors must have the same length")
+
+        fresh = [i for i, k in enumerate(keys) if k not in self._rows]
+        if not fresh:
+            return
+
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {vectors.shape[1]} != cache dim {self.dim}")
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        # Truncate to the committed size, dropping any half-written tail.
+        with self._vectors_path.open("ab") as f:
+            f.truncate(self._count * self.dim * 4)
+            f.write(vectors[fresh].tobytes())
+        with self._keys_path.open("ab") as f:
+            f.truncate(self._count * _KEY_BYTES)
+            f.write(b"".join(keys[i] for i in fresh))
+
+        for i in fresh:
+            self._rows[keys[i]] = self._count
+            self._count += 1
+        self._matrix = None
+
+        tmp = self._meta_path.with_suffix(".json.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({
+                "model_name": self.model_name,
+                "normalize": self.normalize,
+                "dim": self.dim,
+                "count": self._count,
+            }, f)
+        os.replace(tmp, self._meta_path)
+
+
+class CachedEmbedder:
+    """
+    Wraps an embedder with an EmbeddingCache. Only texts never seen before
+    (for this model / normalize setting) reach the wrapped model, in one
+    batched call.
+    """
+
+    def __init__(self, embedder: Embedder, cache_dir: str | Path):
+        self.embedder = embedder
+        self.model_name = embedder.model_name
+        self.normalize = embedder.normalize
+        self.batch_size = getattr(embedder, "batch_size", None)
+        self.cache = EmbeddingCache(cache_dir, self.model_name, self.normalize)
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, texts: Union[str, List[str]]) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+
+        keys = [text_key(t) for t in texts]
+        rows = self.cache.lookup(keys)
+
+        missing: Dict[bytes, str] = {}
+        for k, t, r in zip(keys, texts, rows):
+            if r is None:
+                missing.setdefault(k, t)
+
+        self.hits += len(texts) - sum(1 for r in rows if r is None)
+        self.misses += len(missing)
+
+        if missing:
+            logger.info("Embedding cache: %d hits, %d misses", len(texts) - len(missing), len(missing))
+            miss_keys = list(missing)
+            self.cache.add(miss_keys, self.embedder.embed(list(missing.values())))
+            rows = self.cache.lookup(keys)
+
+        if not texts:
+            return np.zeros((0, self.embedding_dim()), dtype=np.float32)
+        return self.cache.vectors(rows)
+
+    def embedding_dim(self) -> int:
+        if self.cache.dim is not None:
+            return self.cache.dim
+        return self.embedder.embedding_dim()
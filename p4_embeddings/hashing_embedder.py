@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """
+    Offline pure-NumPy embedding backend.
+
+    Texts become signed feature-hashed bags of words plus character n-grams,
+    with sublinear term frequency and optional IDF weights (see fit()).
+    No model weights, no torch: construction is instant and results are
+    deterministic across machines.
+    """
+
+    def __init__(
+        self,
+        dim: int = 2048,
+        ngram_range: Tuple[int, int] = (3, 5),
+        normalize: bool = True,
+        idf: Optional[np.ndarray] = None,
+    ):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.normalize = normalize
+        self.idf = idf
+
+    @property
+    def model_name(self) -> str:
+        lo, hi = self.ngram_range
+        name = f"hashing-ngram-d{self.dim}-n{lo}{hi}"
+        if self.idf is not None:
+            name += "-idf" + hashlib.blake2b(self.idf.tobytes(), digest_size=4).hexdigest()
+        return name
+
+    @classmethod
+    def fit(cls, texts: Iterable[str], **kwargs) -> "HashingEmbedder":
+        """
+        Builds an embedder whose buckets are IDF-weighted over `texts`.
+        """
+        embedder = cls(**kwargs)
+        df = np.zeros(embedder.dim, dtype=np.float64)
+        n = 0
+        for text in texts:
+            df[list(embedder._features(text))] += 1
+            n += 1
+        embedder.idf = (np.log((1 + n) / (1 + df)) + 1.0).astype(np.float32)
+        return embedder
+
+    def _features(self, text: str) -> Dict[int, float]:
+        counts: Dict[int, float] = {}
+        lo, hi = self.ngram_range
+        for word in _WORD.findall(text.lower()):
+            grams = [word]
+            padded = f" {word} "
+            for n in range(lo, hi + 1):
+                grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+            for g in grams:
+                h = zlib.crc32(g.encode("utf-8"))
+                idx = h % self.dim
+                sign = 1.0 if (h >> 31) & 1 else -1.0
+                counts[idx] = counts.get(idx, 0.0) + sign
+        return counts
+
+    def embed(self, texts: Union[str, List[str]]) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for idx, v in self._features(text).items():
+                if v:
+                    out[i, idx] = math.copysign(1.0 + math.log(abs(v)), v)
+
+        if self.idf is not None:
+            out *= self.idf
+        if self.normalize:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    def embedding_dim(self) -> int:
+        return self.dim
@@ -1,6 +1,10 @@
 import json
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from p4_mappers.mapping_fingerprint import MappingFingerprint, fingerprint_path
+from p4_mappers.mapping_scores import MappingScores, scores_path
+from p4_mappers.mapping_table import MappingTable, table_path
 
 
 class MappingExporter:
@@ -8,9 +12,25 @@ class MappingExporter:
         self,
         mappings: List[Dict],
         output_path: str | Path,
+        fingerprint: Optional[MappingFingerprint] = None,
+        scores: Optional[MappingScores] = None,
+        compact: bool = True,
     ) -> None:
         output_path = Path(output_path)
         with output_path.open("w", encoding="utf-8") as f:
             json.dump(mappings, f, indent=2)
 
+        # Written alongside so the next run can remap incrementally
+        if fingerprint is not None:
+            fingerprint.save(fingerprint_path(output_path))
+
+        # Top-k parent scores for model-free threshold / review tooling
+        if scores is not None:
+            scores.save(scores_path(output_path))
+
+        # Memory-mapped table with child_id / parent_id indexes for consumers;
+        # the JSON above stays the human-reviewable copy
+        if compact:
+            MappingTable.save(mappings, table_path(output_path))
+
         print(f"✔ Archetype mapping exported → {output_path} ({len(mappings)} rows)")
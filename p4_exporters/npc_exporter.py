@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+DEFAULT_CHUNK_RECORDS = 250_000
+DEFAULT_BLOCK_RECORDS = 256
+_MERGE_BLOCK = 1 << 16
+
+# One index entry: where the NPC's block lives and its line inside it.
+# Sort keys are kept in a separate u64 file so lookups can binary-search a
+# contiguous memmap.
+LOCATION_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("chunk", "<u4"),
+    ("length", "<u4"),
+    ("line", "<u4"),
+])
+
+_BIAS = 1 << 31
+
+_INDEX_FILES = ("cells.key", "cells.loc", "ids.key", "ids.loc")
+_RUN_FILES = ("*.run.key", "*.run.loc")
+
+
+def cell_key(x: int, y: int) -> int:
+    """
+    u64 sort key ordering cells row-major (y, then x).
+    """
+    return ((y + _BIAS) << 32) | (x + _BIAS)
+
+
+def id_key(npc_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(npc_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def archive_dirname(map_name: str) -> str:
+    """
+    Directory name for a map's archive: the map name with anything but
+    letters, digits, "_", "-" and "." replaced by "_", so a name taken from
+    a map's meta cannot point outside the output directory.
+    """
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", map_name).strip("_")
+    if slug.strip(".") == "":
+        raise ValueError(f"Map name {map_name!r} is not usable as a directory name")
+    return slug
+
+
+def encode_npc(npc: Dict) -> bytes:
+    """
+    One archive line: compact JSON plus newline.
+    """
+    return json.dumps(npc, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class NpcExporter:
+    """
+    Streams NPC payloads of one map to disk with random-access indexes.
+
+    Layout of <output_dir>/<archive_dirname(map_name)>/:
+      chunk-00000.jsonl[.gz]   NPCs as compact JSON lines, grouped in blocks
+                               of `block_records`; with compression every
+                               block is its own gzip member, so a chunk is
+                               still a valid .gz file
+      cells.key / cells.loc    index sorted by (y, x)
+      ids.key / ids.loc        index sorted by npc_id hash
+      manifest.json            written last; marks the export complete
+
+    Memory is bounded by one chunk of index entries: each chunk's entries
+    are sorted into a run on disk and the runs are merged blockwise on
+    close().
+    """
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        map_name: str,
+        compress: bool = True,
+        chunk_records: int = DEFAULT_CHUNK_RECORDS,
+        block_records: int = DEFAULT_BLOCK_RECORDS,
+    ):
+        self.dir = Path(output_dir) / archive_dirname(map_name)
+        self.map_name = map_name
+        self.compress = compress
+        self.chunk_records = max(1, int(chunk_records))
+        self.block_records = max(1, int(block_records))
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        # Start from a clean directory: run files are appended to, so
+        # anything left by an earlier (possibly aborted) export would leak
+        # into this one's indexes.
+        for pattern in (MANIFEST_NAME, MANIFEST_NAME + ".tmp", "chunk-*.jsonl*", *_INDEX_FILES, *_RUN_FILES):
+            for stale in self.dir.glob(pattern):
+                stale.unlink()
+
+        self.count = 0
+        self._chunks: List[str] = []
+        self._file = None
+        self._offset = 0
+        self._in_chunk = 0
+
+        self._lines: List[bytes] = []
+        self._cell_keys = np.empty(self.chunk_records, dtype=np.uint64)
+        self._id_keys = np.empty(self.chunk_records, dtype=np.uint64)
+        self._locs = np.empty(self.chunk_records, dtype=LOCATION_DTYPE)
+        self._runs: List[int] = [0]
+
+    def __enter__(self) -> "NpcExporter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+            return
+
+        # Aborted: no manifest gets written; drop partial runs / indexes.
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for pattern in (*_INDEX_FILES, *_RUN_FILES):
+            for partial in self.dir.glob(pattern):
+                partial.unlink()
+
+    # -------------------------------------------------
+    # Writing
+    # -------------------------------------------------
+    def write(self, npc: Dict) -> None:
+        coords = npc["origin"]["coordinates"]
+        self.write_encoded(encode_npc(npc), int(coords["x"]), int(coords["y"]), npc["npc_id"])
+
+    def write_encoded(self, line: bytes, x: int, y: int, npc_id: str) -> None:
+        """
+        Writes an NPC already encoded with encode_npc() (e.g. by a
+        generate_parallel() worker); x, y and npc_id must match the line.
+        """
+        if self._file is None:
+            self._open_chunk()
+
+        i = self._in_chunk
+        self._cell_keys[i] = cell_key(x, y)
+        self._id_keys[i] = id_key(npc_id)
+        self._lines.append(line)
+        self._in_chunk += 1
+        self.count += 1
+
+        if len(self._lines) >= self.block_records:
+            self._flush_block()
+        if self._in_chunk >= self.chunk_records:
+            self._close_chunk()
+
+    def write_many(self, npcs: Iterable[Dict]) -> int:
+        n = 0
+        for npc in npcs:
+            self.write(npc)
+            n += 1
+        return n
+
+    def _open_chunk(self) -> None:
+        name = f"chunk-{len(self._chunks):05d}.jsonl" + (".gz" if self.compress else "")
+        self._chunks.append(name)
+        self._file = (self.dir / name).open("wb")
+        self._offset = 0
+        self._in_chunk = 0
+
+    def _flush_block(self) -> None:
+        if not self._lines:
+            return
+        data = b"".join(self._lines)
+        if self.compress:
+            data = gzip.compress(data, mtime=0)
+        self._file.write(data)
+
+        first = self._in_chunk - len(self._lines)
+        locs = self._locs[first:self._in_chunk]
+        locs["offset"] = self._offset
+        locs["chunk"] = len(self._chunks) - 1
+        locs["length"] = len(data)
+        locs["line"] = np.arange(len(self._lines), dtype=np.uint32)
+
+        self._offset += len(data)
+        self._lines = []
+
+    def _close_chunk(self) -> None:
+        self._flush_block()
+        self._file.close()
+        self._file = None
+
+        n = self._in_chunk
+        for name, keys in (("cells", self._cell_keys), ("ids", self._id_keys)):
+            order = np.argsort(keys[:n], kind="stable")
+            with (self.dir / f"{name}.run.key").open("ab") as f:
+                f.write(keys[:n][order].tobytes())
+            with (self.dir / f"{name}.run.loc").open("ab") as f:
+                f.write(self._locs[:n][order].tobytes())
+        self._runs.append(self._runs[-1] + n)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._close_chunk()
+
+        for name in ("cells", "ids"):
+            self._merge_runs(name)
+
+        tmp = self.dir / (MANIFEST_NAME + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({
+                "version": ARCHIVE_VERSION,
+                "map": self.map_name,
+                "count": self.count,
+                "compress": self.compress,
+                "chunks": self._chunks,
+            }, f)
+        os.replace(tmp, self.dir / MANIFEST_NAME)
+
+        logger.info("Exported %d NPCs of %s in %d chunks → %s", self.count, self.map_name, len(self._chunks), self.dir)
+
+    def _merge_runs(self, name: str) -> None:
+        """
+        k-way merge of the sorted per-chunk runs, one window at a time: every
+        window takes the entries up to the smallest "last key loaded" among
+        the runs, so at most k * _MERGE_BLOCK entries are in memory.
+        """
+        run_key = self.dir / f"{name}.run.key"
+        run_loc = self.dir / f"{name}.run.loc"
+        out_key = self.dir / f"{name}.key"
+        out_loc = self.dir / f"{name}.loc"
+
+        if self.count == 0:
+            out_key.write_bytes(b"")
+            out_loc.write_bytes(b"")
+            return
+
+        keys = np.memmap(run_key, dtype=np.uint64, mode="r")
+        locs = np.memmap(run_loc, dtype=LOCATION_DTYPE, mode="r")
+        bounds = self._runs
+
+        # Runs that are already in global order (row-major input for the
+        # cell index) merge to a plain concatenation.
+        ordered = all(keys[bounds[i] - 1] <= keys[bounds[i]] for i in range(1, len(bounds) - 1))
+
+        with out_key.open("wb") as fk, out_loc.open("wb") as fl:
+            if ordered:
+                for lo in range(0, len(keys), _MERGE_BLOCK):
+                    fk.write(keys[lo:lo + _MERGE_BLOCK].tobytes())
+                    fl.write(locs[lo:lo + _MERGE_BLOCK].tobytes())
+            else:
+                pos = list(bounds[:-1])
+                ends = bounds[1:]
+                while True:
+                    live = [r for r in range(len(pos)) if pos[r] < ends[r]]
+                    if not live:
+                        break
+                    limit = min(keys[min(pos[r] + _MERGE_BLOCK, ends[r]) - 1] for r in live)
+
+                    parts_k, parts_l = [], []
+                    for r in live:
+                        hi = min(pos[r] + _MERGE_BLOCK, ends[r])
+                        take = pos[r] + int(np.searchsorted(keys[pos[r]:hi], limit, side="right"))
+                        parts_k.append(keys[pos[r]:take])
+                        parts_l.append(locs[pos[r]:take])
+                        pos[r] = take
+
+                    k = np.concatenate(parts_k)
+                    order = np.argsort(k, kind="stable")
+                    fk.write(k[order].tobytes())
+                    fl.write(np.concatenate(parts_l)[order].tobytes())
+
+        del keys, locs
+        run_key.unlink()
+        run_loc.unlink()
+
+
+class NpcArchive:
+    """
+    Read side of an NpcExporter directory. Lookups binary-search the
+    memory-mapped indexes and read (and decompress) only the blocks that
+    hold the requested NPCs.
+    """
+
+    def __init__(self, path: str | Path):
+        self.dir = Path(path)
+        with (self.dir / MANIFEST_NAME).open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported NPC archive version in {self.dir}")
+
+        self.map_name: str = manifest["map"]
+        self.count: int = manifest["count"]
+        self.compress: bool = manifest["compress"]
+        self.chunks: List[str] = manifest["chunks"]
+
+        self._index = {name: self._open_index(name) for name in ("cells", "ids")}
+        self._block_cache: Tuple[Optional[Tuple[int, int]], List[bytes]] = (None, [])
+
+    @classmethod
+    def open(cls, output_dir: str | Path, map_name: str) -> "NpcArchive":
+        return cls(Path(output_dir) / archive_dirname(map_name))
+
+    def _open_index(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        if self.count == 0:
+            return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=LOCATION_DTYPE)
+        return (
+            np.memmap(self.dir / f"{name}.key", dtype=np.uint64, mode="r"),
+            np.memmap(self.dir / f"{name}.loc", dtype=LOCATION_DTYPE, mode="r"),
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    # -------------------------------------------------
+    # Block access
+    # -------------------------------------------------
+    def _block(self, chunk: int, offset: int, length: int) -> List[bytes]:
+        key, lines = self._block_cache
+        if key == (chunk, offset):
+            return lines
+
+        with (self.dir / self.chunks[chunk]).open("rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        if self.compress:
+            data = gzip.decompress(data)
+        lines = data.splitlines()
+        self._block_cache = ((chunk, offset), lines)
+        return lines
+
+    def _read(self, loc) -> Dict:
+        lines = self._block(int(loc["chunk"]), int(loc["offset"]), int(loc["length"]))
+        return json.loads(lines[int(loc["line"])])
+
+    # -------------------------------------------------
+    # Lookups
+    # -------------------------------------------------
+    def get(self, x: int, y: int) -> List[Dict]:
+        """
+        All NPCs placed on cell (x, y).
+        """
+        keys, locs = self._index["cells"]
+        k = np.uint64(cell_key(x, y))
+        lo = int(np.searchsorted(keys, k, side="left"))
+        hi = int(np.searchsorted(keys, k, side="right"))
+        return [self._read(locs[i]) for i in range(lo, hi)]
+
+    def get_by_id(self, npc_id: str) -> Optional[Dict]:
+        keys, locs = self._index["ids"]
+        k = np.uint64(id_key(npc_id))
+        lo = int(np.searchsorted(keys, k, side="left"))
+        hi = int(np.searchsorted(keys, k, side="right"))
+        for i in range(lo, hi):  # more than one only on hash collisions
+            npc = self._read(locs[i])
+            if npc["npc_id"] == npc_id:
+                return npc
+        return None
+
+    def region(self, x_min: int, y_min: int, x_max: int, y_max: int) -> Iterator[Dict]:
+        """
+        NPCs inside the inclusive box, row-major.
+        """
+        keys, locs = self._index["cells"]
+        for y in range(y_min, y_max + 1):
+            lo = int(np.searchsorted(keys, np.uint64(cell_key(x_min, y)), side="left"))
+            hi = int(np.searchsorted(keys, np.uint64(cell_key(x_max, y)), side="right"))
+            for i in range(lo, hi):
+                yield self._read(locs[i])
+
+    def __iter__(self) -> Iterator[Dict]:
+        """
+        Every NPC in export order, streaming one chunk at a time.
+        """
+        opener = gzip.open if self.compress else open
+        for name in self.chunks:
+            with opener(self.dir / name, "rb") as f:
+                for line in f:
+                    yield json.loads(line)
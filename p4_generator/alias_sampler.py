@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import random
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from p4_core.archetype import ArchetypeParent
+from p4_core.trope import TropeChild
+from p4_rules.biome_registry import BiomeDefinition
+from p4_rules.rule_table import BiomeRuleTable
+
+from p4_generator.trope_selector import TropeIndex
+
+ArchetypeWeight = Callable[[BiomeDefinition, ArchetypeParent], float]
+TropeWeight = Callable[[str, TropeChild], float]
+
+
+class AliasTable:
+    """
+    Vose's alias method: O(n) build, then O(1) weighted draws.
+
+    draw() uses one rng.random() per pick, so picks are deterministic under
+    a seeded random.Random; draw_many() returns N picks as an array from a
+    numpy Generator.
+    """
+
+    __slots__ = ("prob", "alias", "_prob", "_alias", "_n")
+
+    def __init__(self, prob: np.ndarray, alias: np.ndarray):
+        self.prob = prob
+        self.alias = alias
+        # plain lists: indexing numpy scalars costs more than the draw itself
+        self._prob: List[float] = prob.tolist()
+        self._alias: List[int] = alias.tolist()
+        self._n = len(prob)
+
+    @classmethod
+    def from_weights(cls, weights: Iterable[float]) -> "AliasTable":
+        w = np.asarray(list(weights), dtype=np.float64)
+        if len(w) == 0:
+            raise ValueError("Alias table needs at least one weight")
+        if not np.all(np.isfinite(w)) or np.any(w < 0):
+            raise ValueError("Alias table weights must be finite and >= 0")
+        total = w.sum()
+        if total <= 0:
+            raise ValueError("Alias table weights must not all be zero")
+
+        n = len(w)
+        scaled = (w * (n / total)).tolist()
+        prob = np.ones(n, dtype=np.float64)
+        alias = np.arange(n, dtype=np.int32)
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # whatever is left is 1.0 up to rounding and keeps prob = 1, alias = self
+
+        return cls(prob, alias)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def draw(self, rng: random.Random) -> int:
+        u = rng.random() * self._n
+        i = int(u)
+        return i if u - i < self._prob[i] else self._alias[i]
+
+    def draw_many(self, size: int, rng: np.random.Generator) -> np.ndarray:
+        i = rng.integers(0, self._n, size=size)
+        u = rng.random(size)
+        return np.where(u < self.prob[i], i, self.alias[i])
+
+
+def confidence_weight(mapping_rows: Iterable[Dict]) -> TropeWeight:
+    """
+    Trope weight = the mapping's confidence_score for (trope, parent).
+    """
+    scores = {
+        (m["resolved_parent_id"], m["child_id"]): float(m.get("confidence_score") or 0.0)
+        for m in mapping_rows
+    }
+    return lambda parent_id, trope: scores.get((parent_id, trope.id), 0.0)
+
+
+class WeightedSampler:
+    """
+    Weighted archetype / trope picks for PopulationEngine.
+
+    One AliasTable per resolved biome (over its archetype pool, in
+    BiomeRuleTable order) and one per (parent, theme) trope pool (the
+    TropeIndex candidates, in catalog order), built lazily on first use.
+    Without a weight function a pool is sampled uniformly through its alias
+    table.
+    """
+
+    def __init__(
+        self,
+        parents_by_id: Dict[str, ArchetypeParent],
+        trope_index: TropeIndex,
+        rules: BiomeRuleTable,
+        archetype_weight: Optional[ArchetypeWeight] = None,
+        trope_weight: Optional[TropeWeight] = None,
+    ):
+        self.parents_by_id = parents_by_id
+        self.trope_index = trope_index
+        self.rules = rules
+        self.archetype_weight = archetype_weight
+        self.trope_weight = trope_weight
+
+        self._archetypes: Dict[int, Tuple[List[ArchetypeParent], AliasTable]] = {}
+        self._tropes: Dict[Tuple[str, str], Tuple[Sequence[TropeChild], AliasTable]] = {}
+
+    # -------------------------------------------------
+    # Tables (cached)
+    # -------------------------------------------------
+    def archetype_table(self, biome_code: Optional[int]) -> Tuple[List[ArchetypeParent], AliasTable]:
+        biome = self.rules.biome(biome_code)
+        entry = self._archetypes.get(biome.code)
+        if entry is None:
+            pool = [self.parents_by_id[pid] for pid in self.rules.pool(biome.code)]
+            weigh = self.archetype_weight
+            table = AliasTable.from_weights(weigh(biome, p) if weigh else 1.0 for p in pool)
+            entry = self._archetypes[biome.code] = (pool, table)
+        return entry
+
+    def trope_table(self, parent_id: str, biome_theme: str) -> Tuple[Sequence[TropeChild], AliasTable]:
+        key = (parent_id, biome_theme)
+        entry = self._tropes.get(key)
+        if entry is None:
+            pool = self.trope_index.candidates(parent_id, biome_theme)
+            weigh = self.trope_weight
+            table = AliasTable.from_weights(weigh(parent_id, t) if weigh else 1.0 for t in pool)
+            entry = self._tropes[key] = (pool, table)
+        return entry
+
+    # -------------------------------------------------
+    # Draws
+    # -------------------------------------------------
+    def archetype(self, biome_code: Optional[int], rng: random.Random) -> ArchetypeParent:
+        pool, table = self.archetype_table(biome_code)
+        return pool[table.draw(rng)]
+
+    def trope(self, parent_id: str, biome_theme: str, rng: random.Random) -> TropeChild:
+        pool, table = self.trope_table(parent_id, biome_theme)
+        return pool[table.draw(rng)]
+
+    def archetypes(self, biome_code: Optional[int], size: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        `size` picks as indices into archetype_table(biome_code)[0].
+        """
+        return self.archetype_table(biome_code)[1].draw_many(size, rng)
+
+    def tropes(self, parent_id: str, biome_theme: str, size: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        `size` picks as indices into trope_table(parent_id, biome_theme)[0].
+        """
+        return self.trope_table(parent_id, biome_theme)[1].draw_many(size, rng)
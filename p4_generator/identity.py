@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Tuple
+
+from p4_config.constants import NPC_ID_PREFIX
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# 36**8 ≈ 2.8e12 distinct map tags: any two of 1000 maps share one with
+# probability ~2e-7
+MAP_TAG_LENGTH = 8
+
+# Base36 digits of the NPC id hash appended to a clashing name: two NPCs
+# that clash on one name get the same suffix with probability 36**-6 ≈ 5e-10
+DISAMBIGUATOR_LENGTH = 6
+
+# Name parts: given names are 2-3 syllables, surnames prefix + optional
+# middle + suffix, ~5.5e8 combinations in total.
+_GIVEN = (
+    "a", "ka", "ri", "lo", "mi", "sen", "da", "vo", "el", "tha", "ny", "ro", "bel", "cor", "ian", "ma",
+    "te", "zu", "fin", "lia", "dra", "ve", "no", "sa", "jo", "ren", "ki", "ul", "mar", "ess", "yo", "bri",
+)
+_SURNAME_PREFIX = (
+    "Ash", "Black", "Bright", "Cold", "Dun", "East", "Fair", "Frost", "Gold", "Gray", "Hale", "Iron", "Kes",
+    "Long", "Marsh", "North", "Oak", "Pike", "Quill", "Raven", "Red", "Salt", "Stone", "Storm", "Thorn",
+    "Vale", "West", "White", "Wild", "Winter", "Wolf", "Yar",
+)
+_SURNAME_MIDDLE = ("", "a", "e", "i", "o", "en", "er", "in", "ow", "an", "el", "is", "or", "un", "ar", "il")
+_SURNAME_SUFFIX = (
+    "wood", "field", "brook", "ford", "ridge", "well", "ton", "by", "more", "dale", "hart", "wick", "mere",
+    "gate", "holm", "stead", "cross", "croft", "shaw", "worth", "burn", "thorpe", "ley", "hurst", "mont",
+    "vik", "sen", "son", "ski", "ova", "ier", "ard",
+)
+
+
+def base36(n: int) -> str:
+    if n < 0:
+        return "-" + base36(-n)
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = _DIGITS[r] + out
+        if n == 0:
+            return out
+
+
+def _hash(key: str, size: int) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=size).digest(), "little")
+
+
+@lru_cache(maxsize=256)
+def map_tag(map_name: str) -> str:
+    """
+    Short, stable tag for a map name (base36 of its hash).
+    """
+    return base36(_hash(map_name, 8) % 36 ** MAP_TAG_LENGTH).rjust(MAP_TAG_LENGTH, "0")
+
+
+def npc_id(map_name: str, x: int, y: int, npc_index: int = 0, prefix: str = NPC_ID_PREFIX) -> str:
+    """
+    Deterministic NPC id: <prefix>_<map tag>_<x>_<y>_<index>, numbers in
+    base36, e.g. NPC_GEN_0k3f9x2a_1z_4_0. Unique per (map, cell, index) as
+    long as map tags do not collide.
+    """
+    return f"{prefix}_{map_tag(map_name)}_{base36(x)}_{base36(y)}_{base36(npc_index)}"
+
+
+def parse_npc_id(value: str) -> Tuple[str, int, int, int]:
+    """
+    npc_id() -> (map tag, x, y, npc_index).
+    """
+    parts = value.rsplit("_", 4)
+    if len(parts) != 5:
+        raise ValueError(f"Not an NPC id: {value!r}")
+    _, tag, x, y, i = parts
+    return tag, int(x, 36), int(y, 36), int(i, 36)
+
+
+def npc_name(seed: int, map_name: str, x: int, y: int, npc_index: int = 0, attempt: int = 0) -> str:
+    """
+    Personal name for one NPC, drawn from a hash of (seed, map, cell,
+    index, attempt): any NPC's name can be recomputed on its own. Other
+    `attempt` values give alternative names for the same NPC.
+    """
+    h = _hash(f"{seed}\0{map_name}\0{x}\0{y}\0{npc_index}\0name\0{attempt}", 16)
+
+    given = []
+    for _ in range(2):
+        h, r = divmod(h, len(_GIVEN))
+        given.append(_GIVEN[r])
+    # optional third syllable, so 2- and 3-syllable names are drawn in
+    # proportion to how many of each exist
+    h, r = divmod(h, len(_GIVEN) + 1)
+    if r < len(_GIVEN):
+        given.append(_GIVEN[r])
+
+    h, p = divmod(h, len(_SURNAME_PREFIX))
+    h, m = divmod(h, len(_SURNAME_MIDDLE))
+    h, s = divmod(h, len(_SURNAME_SUFFIX))
+    surname = _SURNAME_PREFIX[p] + _SURNAME_MIDDLE[m] + _SURNAME_SUFFIX[s]
+    return "".join(given).capitalize() + " " + surname
+
+
+class NameRegistry:
+    """
+    Memory-bounded set of issued names: a Bloom filter sized for
+    `capacity` names at `error_rate` false positives (~1.8 bytes per name
+    at 0.1%).
+
+    A name the filter has not seen is certainly new and is kept as is.
+    Every filter hit, a real clash or a false positive, gets the suffix
+    disambiguate(name, npc_id), which depends only on the NPC id. So which
+    NPC of a clashing group keeps the bare name depends on arrival order,
+    but every renamed NPC's name does not.
+
+    Uniqueness holds within one registry, i.e. one export (all shards of
+    it); maps exported separately can still share names.
+    """
+
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 0.001):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be >= 1 and 0 < error_rate < 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = max(64, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._filter = bytearray((self.bits + 7) // 8)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._filter)
+
+    def _positions(self, name: str) -> Iterator[int]:
+        # double hashing: h1 + i * h2 over one 128-bit digest
+        h = _hash(name, 16)
+        h1, h2 = h & 0xFFFFFFFFFFFFFFFF, (h >> 64) | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def __contains__(self, name: str) -> bool:
+        f = self._filter
+        return all(f[p >> 3] & (1 << (p & 7)) for p in self._positions(name))
+
+    def add(self, name: str) -> bool:
+        """
+        Registers `name`; False if it was (probably) registered already.
+        """
+        f = self._filter
+        new = False
+        for p in self._positions(name):
+            byte, bit = p >> 3, 1 << (p & 7)
+            if not f[byte] & bit:
+                f[byte] |= bit
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+    def register(self, name: str, owner_id: str) -> str:
+        """
+        Registers `name` for the NPC `owner_id`; returns it, or the
+        disambiguated name if it was (probably) taken.
+        """
+        if self.add(name):
+            return name
+        unique = disambiguate(name, owner_id)
+        self.add(unique)
+        return unique
+
+    def claim(self, seed: int, map_name: str, x: int, y: int, npc_index: int = 0) -> str:
+        return self.register(npc_name(seed, map_name, x, y, npc_index), npc_id(map_name, x, y, npc_index))
+
+    def dedupe(self, npcs: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Passes NPCs through, renaming those whose name is already taken
+        in this registry (e.g. between generate_parallel() shards).
+        """
+        for npc in npcs:
+            npc["name"] = self.register(npc["name"], npc["npc_id"])
+            yield npc
+
+
+def disambiguate(name: str, owner_id: str, length: int = DISAMBIGUATOR_LENGTH) -> str:
+    """
+    `name` plus a suffix of `length` base36 digits from the hash of the NPC
+    id, e.g. "Kari Ashwood-k3f9x2": depends only on the NPC. Generated
+    names have no hyphen, so a suffixed name never equals a bare one.
+    """
+    digits = base36(_hash(owner_id, 8) % 36 ** length).rjust(length, "0")
+    return f"{name}-{digits}"
+
+
+def npc_identity(seed: int, map_name: str, x: int, y: int, npc_index: int = 0) -> Tuple[str, str]:
+    """
+    (npc_id, name) for one NPC.
+    """
+    return npc_id(map_name, x, y, npc_index), npc_name(seed, map_name, x, y, npc_index)
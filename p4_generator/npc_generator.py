@@ -1,16 +1,20 @@
 from __future__ import annotations
 
 import random
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+from p4_core.archetype import ArchetypeParent
+from p4_core.trope import TropeChild
 from p4_core.world_cell import WorldCell
-from p4_rules.biome_registry import get_biome
+from p4_rules.biome_registry import BiomeDefinition, get_biome
 from p4_rules.archetype_pools import ARCHETYPE_POOLS
 from p4_rules.biome_rules import BIOME_OCEAN_MODIFIERS
 
 from p4_generator.ocean_calculator import apply_biome_modifiers
 from p4_generator.archetype_selector import select_archetype
-from p4_generator.trope_selector import select_trope
+from p4_generator.trope_selector import TropeIndex, select_trope
+from p4_generator.seeding import npc_rng
+from p4_generator.identity import npc_identity
 
 
 def generate_npc(
@@ -21,8 +25,16 @@ def generate_npc(
     tropes: List,
     mapping_rows: List[Dict],
     seed: int = 1337,
+    trope_index: Optional[TropeIndex] = None,
+    per_cell_seed: bool = False,
+    npc_index: int = 0,
 ) -> Dict:
-    rng = random.Random(seed)
+    # per_cell_seed: derive the RNG from (seed, map, x, y, npc_index) instead
+    # of replaying the same sequence for every cell (see seeding.npc_seed)
+    if per_cell_seed:
+        rng = npc_rng(seed, terrain_map.name, x, y, npc_index)
+    else:
+        rng = random.Random(seed)
 
     # -------------------------------------------------
     # Terrain lookup
@@ -59,20 +71,52 @@ def generate_npc(
     # -------------------------------------------------
     # Trope selection (genre-aware)
     # -------------------------------------------------
-    trope = select_trope(
-        tropes=tropes,
-        mapping_rows=mapping_rows,
-        parent_id=parent.id,
-        biome_theme=biome.theme,
-        rng=rng,
+    if trope_index is not None:
+        trope = trope_index.select(parent.id, biome.theme, rng)
+    else:
+        trope = select_trope(
+            tropes=tropes,
+            mapping_rows=mapping_rows,
+            parent_id=parent.id,
+            biome_theme=biome.theme,
+            rng=rng,
+        )
+
+    npc_id, name = npc_identity(seed, terrain_map.name, x, y, npc_index)
+
+    return build_npc_payload(
+        x=x,
+        y=y,
+        npc_id=npc_id,
+        name=name,
+        biome=biome,
+        parent=parent,
+        trope=trope,
+        ocean_stats=ocean_stats,
+        trait=trait,
+        explanation=explanation,
     )
 
-    # -------------------------------------------------
-    # Final NPC payload
-    # -------------------------------------------------
-    npc = {
-        "npc_id": f"NPC_GEN_x{x}y{y}",
-        "name": trope.name,
+
+def build_npc_payload(
+    x: int,
+    y: int,
+    npc_id: str,
+    name: str,
+    biome: BiomeDefinition,
+    parent: ArchetypeParent,
+    trope: TropeChild,
+    ocean_stats: Dict[str, float],
+    trait: str,
+    explanation: str,
+) -> Dict:
+    """
+    Assembles the final NPC dict. Shared by single and batched generation
+    so both produce byte-identical payloads.
+    """
+    return {
+        "npc_id": npc_id,
+        "name": name,
         "archetype_parent": parent.id,
         "archetype_name": parent.name,
         "trope_child": trope.id,
@@ -94,5 +138,3 @@ def generate_npc(
             "dialogue_voice": biome.theme,
         },
     }
-
-    return npc
@@ -1,6 +1,10 @@
 from __future__ import annotations
 from typing import Dict, Tuple
 
+import numpy as np
+
+from p4_rules.biome_rules import OCEAN_TRAITS
+
 
 def clamp(v: float) -> float:
     return max(0.0, min(1.0, v))
@@ -17,7 +21,7 @@ def apply_biome_modifiers(
     final = {}
     explanations = []
 
-    for trait in ["openness", "conscientiousness", "extroversion", "agreeableness", "neuroticism"]:
+    for trait in OCEAN_TRAITS:
         base = base_ocean.get(trait, 0.5)
         delta = biome_mods.get(trait, 0.0)
         final_val = clamp(base + delta)
@@ -31,3 +35,22 @@ def apply_biome_modifiers(
     explanation = "Biome influence: " + ", ".join(explanations) if explanations else "Minimal environmental influence."
 
     return final, explanation
+
+
+def ocean_vector(values: Dict[str, float], default: float) -> np.ndarray:
+    """
+    OCEAN dict -> float64 (5,) array in OCEAN_TRAITS order.
+    """
+    return np.array([values.get(trait, default) for trait in OCEAN_TRAITS], dtype=np.float64)
+
+
+def apply_biome_modifiers_array(base: np.ndarray, biome_mods: np.ndarray) -> np.ndarray:
+    """
+    Vectorized apply_biome_modifiers() for (N, 5) baselines.
+    `biome_mods` is (N, 5) (per row) or (5,) (same deltas for every row).
+    Values are clamped to [0, 1] and rounded to 3 decimals; np.round may
+    differ from round() in the last bit on exact .0005 ties.
+    """
+    final = np.asarray(base, dtype=np.float64) + biome_mods
+    np.clip(final, 0.0, 1.0, out=final)
+    return np.round(final, 3, out=final)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from p4_core.archetype import ArchetypeParent
+from p4_rules.archetype_pools import ARCHETYPE_POOLS
+from p4_rules.biome_rules import BIOME_OCEAN_MODIFIERS
+
+from p4_generator.ocean_calculator import (
+    OCEAN_TRAITS,
+    apply_biome_modifiers,
+    apply_biome_modifiers_array,
+    ocean_vector,
+)
+
+
+class OceanTable:
+    """
+    Final OCEAN stats for every (parent archetype, biome) pair, compiled once.
+
+    stats          float64 (P, B, 5)  columns in OCEAN_TRAITS order
+    dominant       int8    (P, B)     index into OCEAN_TRAITS
+    explanation    int16   (B,)       index into `explanations` (the text
+                                      only depends on the biome's deltas)
+    base / mods    float64 (P, 5) / (B, 5)  inputs, for the vectorized path
+
+    Rows are the parents named in the archetype pools, columns the biome
+    codes that have a pool or OCEAN modifiers. Cells are filled by
+    apply_biome_modifiers() itself, so lookups match it exactly.
+    """
+
+    def __init__(
+        self,
+        parent_ids: Sequence[str],
+        biome_codes: Sequence[int],
+        base: np.ndarray,
+        mods: np.ndarray,
+        stats: np.ndarray,
+        dominant: np.ndarray,
+        explanation: np.ndarray,
+        explanations: Sequence[str],
+    ):
+        self.parent_ids = list(parent_ids)
+        self.biome_codes = list(biome_codes)
+        self.base = base
+        self.mods = mods
+        self.stats = stats
+        self.dominant = dominant
+        self.explanation = explanation
+        self.explanations = tuple(explanations)
+
+        self._row = {pid: i for i, pid in enumerate(self.parent_ids)}
+        self._col = {code: j for j, code in enumerate(self.biome_codes)}
+
+    @classmethod
+    def build(
+        cls,
+        parents_by_id: Mapping[str, ArchetypeParent],
+        pools: Mapping[int, Sequence[str]] = ARCHETYPE_POOLS,
+        modifiers: Mapping[int, Mapping[str, float]] = BIOME_OCEAN_MODIFIERS,
+    ) -> "OceanTable":
+        parent_ids: List[str] = []
+        for members in pools.values():
+            for pid in members:
+                if pid in parents_by_id and pid not in parent_ids:
+                    parent_ids.append(pid)
+        biome_codes = sorted(set(pools) | set(modifiers))
+
+        P, B = len(parent_ids), len(biome_codes)
+        base = np.zeros((P, 5), dtype=np.float64)
+        mods = np.zeros((B, 5), dtype=np.float64)
+        stats = np.zeros((P, B, 5), dtype=np.float64)
+        dominant = np.zeros((P, B), dtype=np.int8)
+        explanation = np.zeros(B, dtype=np.int16)
+
+        interned: Dict[str, int] = {}
+        for i, pid in enumerate(parent_ids):
+            base[i] = ocean_vector(parents_by_id[pid].ocean_bias, 0.5)
+        for j, code in enumerate(biome_codes):
+            biome_mods = modifiers.get(code, {})
+            mods[j] = ocean_vector(biome_mods, 0.0)
+            for i, pid in enumerate(parent_ids):
+                final, text = apply_biome_modifiers(parents_by_id[pid].ocean_bias, biome_mods)
+                stats[i, j] = [final[t] for t in OCEAN_TRAITS]
+                # first maximum, like max(final, key=final.get)
+                dominant[i, j] = int(np.argmax(stats[i, j]))
+                explanation[j] = interned.setdefault(text, len(interned))
+
+        return cls(parent_ids, biome_codes, base, mods, stats, dominant, explanation, list(interned))
+
+    # -------------------------------------------------
+    # Scalar lookups
+    # -------------------------------------------------
+    def index(self, parent_id: str, biome_code: int) -> Tuple[int, int]:
+        try:
+            return self._row[parent_id], self._col[biome_code]
+        except KeyError:
+            raise KeyError(f"No OCEAN entry for ({parent_id}, {biome_code})") from None
+
+    def lookup(self, parent_id: str, biome_code: int) -> Tuple[Dict[str, float], str, str]:
+        """
+        (ocean_stats, explanation, dominant trait) as generate_npc() computes
+        them.
+        """
+        i, j = self.index(parent_id, biome_code)
+        ocean_stats = dict(zip(OCEAN_TRAITS, self.stats[i, j].tolist()))
+        trait = OCEAN_TRAITS[self.dominant[i, j]]
+        return ocean_stats, self.explanations[self.explanation[j]], trait
+
+    # -------------------------------------------------
+    # Vectorized
+    # -------------------------------------------------
+    def gather(self, parent_rows: np.ndarray, biome_cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (N, 5) stats and (N,) dominant-trait indices for N (row, column)
+        pairs, e.g. a whole population's draws.
+        """
+        return self.stats[parent_rows, biome_cols], self.dominant[parent_rows, biome_cols]
+
+    def apply(self, base: np.ndarray, biome_cols: np.ndarray) -> np.ndarray:
+        """
+        Applies each row's biome deltas to an (N, 5) baseline, e.g. parent
+        baselines with per-NPC jitter added. Without jitter this reproduces
+        `stats` (up to np.round ties, see apply_biome_modifiers_array).
+        """
+        return apply_biome_modifiers_array(base, self.mods[biome_cols])
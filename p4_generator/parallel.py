@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from p4_core.archetype import ArchetypeParent
+from p4_core.terrain_map import TerrainMap
+from p4_core.trope import TropeChild
+from p4_exporters.npc_exporter import encode_npc
+from p4_loaders.terrain_loader import TerrainLoader
+from p4_generator.identity import NameRegistry
+from p4_generator.placement import PopulationPlan, plan_population
+from p4_generator.population import PopulationEngine
+from p4_generator.shared_store import TERRAIN_DIRNAME, SharedStore
+
+DEFAULT_SHARD_ROWS = 64
+
+# Per-process state, set once by _init_worker (catalog shipped to each
+# worker) or _attach_worker (catalog memory-mapped from a SharedStore), so
+# nothing but shard coordinates travels with a task.
+_ENGINE: Optional[PopulationEngine] = None
+_LOAD_MAP: Optional[Callable[[str], TerrainMap]] = None
+_MAPS: Dict[str, TerrainMap] = {}
+
+
+def _init_worker(
+    parents_by_id: Dict[str, ArchetypeParent],
+    tropes: List[TropeChild],
+    mapping_rows: List[Dict],
+    cache_dir: Optional[str],
+    confidence_weighted: bool = False,
+) -> None:
+    global _ENGINE, _LOAD_MAP
+    _ENGINE = PopulationEngine(parents_by_id, tropes, mapping_rows, confidence_weighted=confidence_weighted)
+    _LOAD_MAP = TerrainLoader(cache_dir=cache_dir).load_map
+    _MAPS.clear()
+
+
+def _attach_worker(store_dir: str, confidence_weighted: bool = False) -> None:
+    global _ENGINE, _LOAD_MAP
+    store = SharedStore.open(store_dir)
+    _ENGINE = store.engine(confidence_weighted)
+    _LOAD_MAP = store.terrain
+    _MAPS.clear()
+
+
+@dataclass
+class EncodedShard:
+    """
+    One shard as archive lines (encode_npc()) plus the keys NpcExporter
+    indexes by, which pickles far smaller than the NPC dicts.
+    """
+    lines: List[bytes]
+    xs: List[int]
+    ys: List[int]
+    npc_ids: List[str]
+    names: List[str]
+
+    @classmethod
+    def encode(cls, npcs: Iterable[Dict]) -> "EncodedShard":
+        shard = cls([], [], [], [], [])
+        for npc in npcs:
+            coords = npc["origin"]["coordinates"]
+            shard.lines.append(encode_npc(npc))
+            shard.xs.append(coords["x"])
+            shard.ys.append(coords["y"])
+            shard.npc_ids.append(npc["npc_id"])
+            shard.names.append(npc["name"])
+        return shard
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def decode(self) -> List[Dict]:
+        return [json.loads(line) for line in self.lines]
+
+    def dedupe(self, registry: NameRegistry) -> None:
+        """
+        NameRegistry.dedupe() on the encoded lines; only renamed NPCs are
+        re-encoded.
+        """
+        for i, (npc_id, name) in enumerate(zip(self.npc_ids, self.names)):
+            unique = registry.register(name, npc_id)
+            if unique != name:
+                npc = json.loads(self.lines[i])
+                npc["name"] = self.names[i] = unique
+                self.lines[i] = encode_npc(npc)
+
+    def write_to(self, exporter) -> None:
+        for line, x, y, npc_id in zip(self.lines, self.xs, self.ys, self.npc_ids):
+            exporter.write_encoded(line, x, y, npc_id)
+
+
+Shard = Union[List[Dict], EncodedShard]
+
+
+def _shard_npcs(
+    engine: PopulationEngine,
+    terrain_map: TerrainMap,
+    start: int,
+    stop: int,
+    seed: int,
+    per_cell_seed: bool,
+    plan: Optional[PopulationPlan],
+) -> Iterator[Dict]:
+    if plan is not None:
+        return engine.iter_placed(terrain_map, plan, seed=seed)
+    return engine.iter_npcs(terrain_map, seed=seed, per_cell_seed=per_cell_seed, rows=(start, stop))
+
+
+def _run_shard(
+    path: str,
+    start: int,
+    stop: int,
+    seed: int,
+    per_cell_seed: bool,
+    plan: Optional[PopulationPlan],
+    encoded: bool,
+) -> Shard:
+    terrain_map = _MAPS.get(path)
+    if terrain_map is None:
+        # Served from the terrain cache (memory-mapped) after the first load.
+        terrain_map = _MAPS[path] = _LOAD_MAP(path)
+    npcs = _shard_npcs(_ENGINE, terrain_map, start, stop, seed, per_cell_seed, plan)
+    return EncodedShard.encode(npcs) if encoded else list(npcs)
+
+
+def row_shards(height: int, shard_rows: int = DEFAULT_SHARD_ROWS) -> List[Tuple[int, int]]:
+    shard_rows = max(1, int(shard_rows))
+    return [(start, min(start + shard_rows, height)) for start in range(0, height, shard_rows)]
+
+
+def generate_parallel(
+    map_paths: Sequence[str | Path],
+    parents_by_id: Dict[str, ArchetypeParent],
+    tropes: List[TropeChild],
+    mapping_rows: List[Dict],
+    seed: int = 1337,
+    per_cell_seed: bool = False,
+    workers: Optional[int] = None,
+    shard_rows: int = DEFAULT_SHARD_ROWS,
+    cache_dir: str | Path | None = None,
+    store_dir: str | Path | None = None,
+    count: Optional[int] = None,
+    encoded: bool = False,
+    confidence_weighted: bool = False,
+) -> Iterator[Tuple[str, Shard]]:
+    """
+    Generates the population of every map on a process pool.
+
+    Maps are split into bands of `shard_rows` grid rows; each worker loads
+    a map once (from the terrain cache in `cache_dir`, which this process
+    warms first, if one is given) and keeps its PopulationEngine for all
+    shards. Yields (map_name, npcs) per
+    shard in deterministic order, maps in the given order and bands top to
+    bottom, so the concatenated output equals generate_population() per
+    map. At most 2 * workers shards are in flight.
+
+    With `count`, each map gets plan_population(map, count, seed) and the
+    output equals PopulationEngine.iter_placed() on that plan.
+
+    encoded=True yields EncodedShards instead of NPC dicts: workers also
+    do the JSON encoding, and the parent only dedupes names and appends
+    lines (EncodedShard.dedupe() / write_to()). Returning dicts leaves
+    unpickling and encoding every NPC to the parent, which caps scaling.
+
+    With `store_dir`, a SharedStore is built there first and workers attach
+    to it (memory-mapped) instead of each receiving a pickled copy of the
+    catalog and mappings, so memory no longer grows with the worker count.
+
+    confidence_weighted is passed to every PopulationEngine.
+    """
+    workers = workers or os.cpu_count() or 1
+    cache = str(cache_dir) if cache_dir is not None else None
+    if store_dir is not None and workers > 1:
+        # the store keeps its own terrain cache; read shard plans from it
+        cache = str(Path(store_dir) / TERRAIN_DIRNAME)
+    loader = TerrainLoader(cache_dir=cache)
+
+    def shards() -> Iterator[Tuple[TerrainMap, str, int, int, Optional[PopulationPlan]]]:
+        for path in map_paths:
+            terrain_map = loader.load_map(path)
+            plan = plan_population(terrain_map, count, seed=seed) if count is not None else None
+            y0 = terrain_map.origin[1]
+            for start, stop in row_shards(terrain_map.height, shard_rows):
+                band = plan.rows(y0 + start, y0 + stop) if plan is not None else None
+                yield terrain_map, str(path), start, stop, band
+
+    if workers <= 1:
+        engine = PopulationEngine(parents_by_id, tropes, mapping_rows, confidence_weighted=confidence_weighted)
+        for terrain_map, _, start, stop, band in shards():
+            npcs = _shard_npcs(engine, terrain_map, start, stop, seed, per_cell_seed, band)
+            yield terrain_map.name, EncodedShard.encode(npcs) if encoded else list(npcs)
+        return
+
+    if store_dir is not None:
+        SharedStore.build(store_dir, list(parents_by_id.values()), tropes, mapping_rows, map_paths)
+        initializer, initargs = _attach_worker, (str(store_dir), confidence_weighted)
+    else:
+        initializer, initargs = _init_worker, (parents_by_id, tropes, mapping_rows, cache, confidence_weighted)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        pending: Deque[Tuple[str, Future]] = deque()
+        try:
+            for terrain_map, path, start, stop, band in shards():
+                future = pool.submit(_run_shard, path, start, stop, seed, per_cell_seed, band, encoded)
+                pending.append((terrain_map.name, future))
+                if len(pending) >= 2 * workers:
+                    name, future = pending.popleft()
+                    yield name, future.result()
+
+            while pending:
+                name, future = pending.popleft()
+                yield name, future.result()
+        finally:
+            # consumer stopped early (or a shard failed): drop queued work
+            for _, future in pending:
+                future.cancel()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from p4_core.terrain_map import TerrainMap
+from p4_rules.rule_table import BiomeRuleTable
+
+from p4_generator.alias_sampler import AliasTable
+
+logger = logging.getLogger(__name__)
+
+
+def placement_weights(terrain_map: TerrainMap, rules: Optional[BiomeRuleTable] = None) -> np.ndarray:
+    """
+    (height, width) grid of how many people each cell attracts.
+
+    Weight is the cell's human_density; water (is_water = 1), unbuildable
+    (buildable = 0) and missing cells get 0. Cells without a density value
+    use their biome's population_density, and so does the whole map when
+    it has no density signal at all (every eligible cell at 0).
+    """
+    rules = rules or BiomeRuleTable.build()
+
+    # unknown flags (-1) do not exclude a cell
+    eligible = terrain_map.present & (terrain_map.is_water != 1) & (terrain_map.buildable != 0)
+    biome_density = rules.population[rules.index(terrain_map.biome_code)].astype(np.float64)
+
+    density = terrain_map.human_density
+    weights = np.where(np.isnan(density), biome_density, density)
+    weights = np.where(eligible, np.clip(weights, 0.0, None), 0.0)
+
+    if eligible.any() and not weights.any():
+        logger.warning("Map %s has no human_density; weighting cells by biome population_density", terrain_map.name)
+        weights = np.where(eligible, biome_density, 0.0)
+    return weights
+
+
+@dataclass(frozen=True)
+class PopulationPlan:
+    """
+    Occupied cells of one map in row-major order and how many NPCs each
+    gets. Iterating yields (x, y, npc_index) per NPC, npc_index counting
+    from 0 within its cell.
+    """
+    map_name: str
+    seed: int
+    xs: np.ndarray
+    ys: np.ndarray
+    counts: np.ndarray
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        for x, y, count in zip(self.xs.tolist(), self.ys.tolist(), self.counts.tolist()):
+            for npc_index in range(count):
+                yield x, y, npc_index
+
+    def rows(self, y_start: int, y_stop: int) -> "PopulationPlan":
+        """
+        The part of the plan on map rows y_start <= y < y_stop.
+        """
+        lo, hi = np.searchsorted(self.ys, [y_start, y_stop]).tolist()
+        return PopulationPlan(self.map_name, self.seed, self.xs[lo:hi], self.ys[lo:hi], self.counts[lo:hi])
+
+
+class PlacementPlanner:
+    """
+    Spreads a target number of NPCs over a map in proportion to
+    placement_weights().
+
+    One alias table over every cell with a non-zero weight is built up
+    front; a plan is then `count` O(1) draws plus a bincount, so placing a
+    million NPCs is O(N + cells) and several NPCs can land in one cell.
+    Plans are deterministic for a given seed.
+    """
+
+    def __init__(
+        self,
+        terrain_map: TerrainMap,
+        rules: Optional[BiomeRuleTable] = None,
+        weights: Optional[np.ndarray] = None,
+    ):
+        if weights is None:
+            weights = placement_weights(terrain_map, rules)
+        if weights.shape != terrain_map.present.shape:
+            raise ValueError(f"weights shape {weights.shape} does not match map {terrain_map.present.shape}")
+
+        self.terrain_map = terrain_map
+        # flat row-major indices, so plans come out in _scan() order
+        self.cells = np.flatnonzero(weights > 0)
+        if len(self.cells) == 0:
+            raise ValueError(f"No inhabitable cells in map {terrain_map.name}")
+        self.table = AliasTable.from_weights(weights.ravel()[self.cells])
+
+    def plan(self, count: int, seed: int = 1337) -> PopulationPlan:
+        if count < 0:
+            raise ValueError("count must be >= 0")
+
+        picks = self.table.draw_many(count, np.random.default_rng(seed))
+        per_cell = np.bincount(picks, minlength=len(self.cells))
+        occupied = np.flatnonzero(per_cell)
+
+        rows, cols = np.divmod(self.cells[occupied], self.terrain_map.width)
+        x0, y0 = self.terrain_map.origin
+        return PopulationPlan(
+            map_name=self.terrain_map.name,
+            seed=seed,
+            xs=cols + x0,
+            ys=rows + y0,
+            counts=per_cell[occupied],
+        )
+
+
+def plan_population(
+    terrain_map: TerrainMap,
+    count: int,
+    seed: int = 1337,
+    rules: Optional[BiomeRuleTable] = None,
+) -> PopulationPlan:
+    return PlacementPlanner(terrain_map, rules).plan(count, seed)
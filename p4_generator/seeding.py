@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import hashlib
+import random
+
+
+def npc_seed(global_seed: int, map_name: str, x: int, y: int, npc_index: int = 0) -> int:
+    """
+    Counter-based seed for one NPC: a hash of (global seed, map, cell, index).
+
+    Unlike re-seeding random.Random(seed) for every cell, each NPC gets its
+    own stream, and it can be regenerated on its own, in any order, on any
+    worker / process, with bit-identical output.
+    """
+    key = f"{global_seed}\0{map_name}\0{x}\0{y}\0{npc_index}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def npc_rng(global_seed: int, map_name: str, x: int, y: int, npc_index: int = 0) -> random.Random:
+    return random.Random(npc_seed(global_seed, map_name, x, y, npc_index))
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import random
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from p4_core.archetype import ArchetypeParent
+from p4_core.terrain_map import TerrainMap
+from p4_core.trope import TropeChild
+from p4_loaders.terrain_loader import TerrainLoader
+from p4_mappers.mapping_table import MappingTable
+from p4_utils.packed_file import close_packed, pack_strings, packed_string, read_packed, write_packed
+
+from p4_generator.population import PopulationEngine
+from p4_generator.trope_selector import TropeIndex
+
+logger = logging.getLogger(__name__)
+
+STORE_MAGIC = b"P4STORE1"
+STORE_VERSION = 1
+
+CATALOG_NAME = "catalog.bin"
+MAPPING_NAME = "mapping.table.bin"
+MANIFEST_NAME = "manifest.json"
+TERRAIN_DIRNAME = "terrain"
+
+_PARENT_FIELDS = ("id", "name", "function_category", "primary_goal", "primary_fear")
+_TROPE_FIELDS = ("id", "name", "parent_archetype_raw", "description", "genre_tag")
+
+
+def _pack_columns(prefix: str, rows: Sequence, fields: Sequence[str], sections: Dict, blob: bytearray) -> None:
+    for field in fields:
+        values = [getattr(r, field) for r in rows]
+        offsets, data = pack_strings(values)
+        sections[f"{prefix}.{field}"] = offsets + len(blob)
+        sections[f"{prefix}.{field}.null"] = np.array([v is None for v in values], dtype=np.uint8)
+        blob += data
+
+
+class TropeTable(Sequence):
+    """
+    Read-only trope catalog backed by the store. TropeChild objects are only
+    built for the rows that are actually touched.
+    """
+
+    def __init__(self, sections: Dict[str, np.ndarray]):
+        self._s = sections
+        self._blob = sections["blob"]
+        self._rows: Dict[int, TropeChild] = {}
+
+    def __len__(self) -> int:
+        return len(self._s["trope.id"]) - 1
+
+    def _field(self, field: str, i: int) -> Optional[str]:
+        if self._s[f"trope.{field}.null"][i]:
+            return None
+        return packed_string(self._s[f"trope.{field}"], self._blob, i)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("trope index out of range")
+
+        trope = self._rows.get(i)
+        if trope is None:
+            trope = self._rows[i] = TropeChild(**{f: self._field(f, i) for f in _TROPE_FIELDS})
+        return trope
+
+
+class _Pool(Sequence):
+    # rng.choice only needs len() and indexing, so a pool view draws exactly
+    # like the list TropeIndex would hold.
+    __slots__ = ("table", "members")
+
+    def __init__(self, table: TropeTable, members: np.ndarray):
+        self.table = table
+        self.members = members
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.table[int(m)] for m in self.members[i]]
+        return self.table[int(self.members[i])]
+
+
+class StoreTropeIndex:
+    """
+    TropeIndex over the store: pools are ranges of one shared int32 array
+    of trope rows instead of per-process lists.
+    """
+
+    def __init__(self, table: TropeTable, members: np.ndarray, by_parent: Dict, pools: Dict):
+        self._table = table
+        self._members = members
+        self._by_parent = by_parent
+        self._pools = pools
+
+    def _pool(self, span) -> _Pool:
+        return _Pool(self._table, self._members[span[0]:span[1]])
+
+    def candidates(self, parent_id: str, biome_theme: str) -> _Pool:
+        span = self._pools.get((parent_id, biome_theme))
+        if span is not None:
+            return self._pool(span)
+
+        span = self._by_parent.get(parent_id)
+        if span is None or span[0] == span[1]:
+            raise ValueError(f"No child tropes mapped to parent {parent_id}")
+        return self._pool(span)
+
+    def select(self, parent_id: str, biome_theme: str, rng: random.Random) -> TropeChild:
+        return rng.choice(self.candidates(parent_id, biome_theme))
+
+
+class SharedStore:
+    """
+    Read-only, memory-mapped copy of everything generation workers need.
+
+    <store_dir>/
+      catalog.bin         parents, tropes (columnar strings) and the
+                          TropeIndex pools as ranges of trope rows
+      mapping.table.bin   MappingTable
+      terrain/            terrain cache entries (.npy columns)
+      manifest.json
+
+    Every file is opened with mmap, so any number of worker processes that
+    attach to the same store share one copy of the data via the page cache.
+    """
+
+    def __init__(
+        self,
+        store_dir: Path,
+        parents_by_id: Dict[str, ArchetypeParent],
+        tropes: TropeTable,
+        trope_index: StoreTropeIndex,
+        mapping: MappingTable,
+        maps: Dict[str, str],
+        mm: mmap.mmap,
+        sections: Dict[str, np.ndarray],
+    ):
+        self.dir = store_dir
+        self.parents_by_id = parents_by_id
+        self.tropes = tropes
+        self.trope_index = trope_index
+        self.mapping = mapping
+        self.maps = maps
+        self._mm = mm
+        self._sections = sections
+        self._loader = TerrainLoader(cache_dir=store_dir / TERRAIN_DIRNAME)
+        self._terrain: Dict[str, TerrainMap] = {}
+
+    # -------------------------------------------------
+    # Build
+    # -------------------------------------------------
+    @staticmethod
+    def build(
+        store_dir: str | Path,
+        parents: Sequence[ArchetypeParent],
+        tropes: List[TropeChild],
+        mapping_rows: List[Dict],
+        map_paths: Sequence[str | Path] = (),
+    ) -> Path:
+        store_dir = Path(store_dir)
+        store_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = store_dir / MANIFEST_NAME
+        if manifest_path.exists():
+            manifest_path.unlink()
+
+        index = TropeIndex.build(tropes, mapping_rows)
+        row_of = {id(t): i for i, t in enumerate(tropes)}
+
+        members: List[int] = []
+
+        def span(pool: List[TropeChild]) -> List[int]:
+            start = len(members)
+            members.extend(row_of[id(t)] for t in pool)
+            return [start, len(members)]
+
+        by_parent = {pid: span(pool) for pid, pool in index.by_parent.items()}
+        pools = [[pid, theme, *span(pool)] for (pid, theme), pool in index.pools.items()]
+
+        blob = bytearray()
+        sections: Dict[str, np.ndarray] = {}
+        _pack_columns("parent", parents, _PARENT_FIELDS, sections, blob)
+        _pack_columns("trope", tropes, _TROPE_FIELDS, sections, blob)
+        offsets, data = pack_strings([json.dumps(p.ocean_bias) for p in parents])
+        sections["parent.ocean_bias"] = offsets + len(blob)
+        blob += data
+        sections["pool_members"] = np.array(members, dtype=np.int32)
+        sections["blob"] = np.frombuffer(bytes(blob), dtype=np.uint8)
+
+        write_packed(store_dir / CATALOG_NAME, STORE_MAGIC, sections, {
+            "version": STORE_VERSION,
+            "by_parent": by_parent,
+            "pools": pools,
+        })
+        MappingTable.save(mapping_rows, store_dir / MAPPING_NAME)
+
+        loader = TerrainLoader(cache_dir=store_dir / TERRAIN_DIRNAME)
+        maps = {str(Path(p).resolve()): loader.load_map(p).name for p in map_paths}
+
+        with manifest_path.open("w", encoding="utf-8") as f:
+            json.dump({"version": STORE_VERSION, "maps": maps}, f)
+
+        logger.info("Built shared store %s (%d tropes, %d maps)", store_dir, len(tropes), len(maps))
+        return store_dir
+
+    # -------------------------------------------------
+    # Attach
+    # -------------------------------------------------
+    @classmethod
+    def open(cls, store_dir: str | Path) -> "SharedStore":
+        store_dir = Path(store_dir)
+        with (store_dir / MANIFEST_NAME).open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported shared store version in {store_dir}")
+
+        meta, sections, mm = read_packed(store_dir / CATALOG_NAME, STORE_MAGIC)
+        blob = sections["blob"]
+
+        def parent_field(field: str, i: int) -> Optional[str]:
+            if field != "ocean_bias" and sections[f"parent.{field}.null"][i]:
+                return None
+            return packed_string(sections[f"parent.{field}"], blob, i)
+
+        # ~50 parents: materialized once, everything else stays mapped
+        parents_by_id: Dict[str, ArchetypeParent] = {}
+        for i in range(len(sections["parent.id"]) - 1):
+            fields = {f: parent_field(f, i) for f in _PARENT_FIELDS}
+            parent = ArchetypeParent(ocean_bias=json.loads(parent_field("ocean_bias", i)), **fields)
+            parents_by_id[parent.id] = parent
+
+        tropes = TropeTable(sections)
+        trope_index = StoreTropeIndex(
+            tropes,
+            sections["pool_members"],
+            by_parent={pid: tuple(s) for pid, s in meta["by_parent"].items()},
+            pools={(pid, theme): (lo, hi) for pid, theme, lo, hi in meta["pools"]},
+        )
+        mapping = MappingTable.open(store_dir / MAPPING_NAME)
+        if mapping is None:
+            raise ValueError(f"Missing mapping table in {store_dir}")
+
+        return cls(store_dir, parents_by_id, tropes, trope_index, mapping, manifest["maps"], mm, sections)
+
+    def close(self) -> None:
+        self.mapping.close()
+        self._terrain.clear()
+        close_packed(self._sections, self._mm)
+        self._mm = None
+
+    # -------------------------------------------------
+    # Access
+    # -------------------------------------------------
+    def terrain(self, path: str | Path) -> TerrainMap:
+        """
+        Terrain map with memory-mapped columns from the store's cache
+        (recompiled into it if the source changed).
+        """
+        key = str(Path(path).resolve())
+        terrain_map = self._terrain.get(key)
+        if terrain_map is None:
+            terrain_map = self._terrain[key] = self._loader.load_map(path)
+        return terrain_map
+
+    def engine(self, confidence_weighted: bool = False) -> PopulationEngine:
+        return PopulationEngine(
+            self.parents_by_id, self.tropes, self.mapping,
+            trope_index=self.trope_index, confidence_weighted=confidence_weighted,
+        )
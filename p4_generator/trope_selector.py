@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import random
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from p4_core.trope import TropeChild
 
@@ -53,6 +53,17 @@ def select_trope(
     if not candidates:
         raise ValueError(f"No child tropes mapped to parent {parent_id}")
 
+    # -------------------------------------------------
+    # Step 2/3: prefer genre/theme matches, minus exclusions
+    # -------------------------------------------------
+    return rng.choice(theme_pool(candidates, biome_theme))
+
+
+def theme_pool(candidates: List[TropeChild], biome_theme: str) -> List[TropeChild]:
+    """
+    Narrows a parent's candidate tropes to the biome theme.
+    Falls back to all candidates when nothing matches.
+    """
     # -------------------------------------------------
     # Step 2: prefer genre/theme matches
     # -------------------------------------------------
@@ -73,5 +84,73 @@ def select_trope(
             if not any(e in (t.genre_tag or "").lower() for e in excluded)
         ]
 
-    pool = themed if themed else candidates
-    return rng.choice(pool)
+    return themed if themed else candidates
+
+
+class TropeIndex:
+    """
+    Precomputed trope candidate pools keyed by (parent_id, biome_theme).
+
+    Built once from the trope catalog and the mapping artifact; selection is
+    then a dict lookup plus one rng.choice, independent of catalog size.
+    Pools are identical to what select_trope() computes per call.
+    """
+
+    def __init__(
+        self,
+        by_parent: Dict[str, List[TropeChild]],
+        pools: Dict[Tuple[str, str], List[TropeChild]],
+    ):
+        self._by_parent = by_parent
+        self._pools = pools
+
+    @classmethod
+    def build(
+        cls,
+        tropes: List[TropeChild],
+        mapping_rows: Iterable[Dict],
+        themes: Optional[Iterable[str]] = None,
+    ) -> "TropeIndex":
+        parents_of: Dict[str, Set[str]] = {}
+        for m in mapping_rows:
+            parents_of.setdefault(m["child_id"], set()).add(m["resolved_parent_id"])
+
+        # keep catalog order so rng.choice picks the same trope as select_trope
+        by_parent: Dict[str, List[TropeChild]] = {}
+        for t in tropes:
+            for parent_id in parents_of.get(t.id, ()):
+                by_parent.setdefault(parent_id, []).append(t)
+
+        if themes is None:
+            themes = set(THEME_GENRE_HINTS) | set(EXCLUDED_KEYWORDS)
+
+        pools: Dict[Tuple[str, str], List[TropeChild]] = {}
+        for theme in themes:
+            for parent_id, candidates in by_parent.items():
+                pool = theme_pool(candidates, theme)
+                if pool is not candidates:
+                    pools[(parent_id, theme)] = pool
+
+        return cls(by_parent, pools)
+
+    @property
+    def by_parent(self) -> Dict[str, List[TropeChild]]:
+        return self._by_parent
+
+    @property
+    def pools(self) -> Dict[Tuple[str, str], List[TropeChild]]:
+        return self._pools
+
+    def candidates(self, parent_id: str, biome_theme: str) -> List[TropeChild]:
+        pool = self._pools.get((parent_id, biome_theme))
+        if pool is not None:
+            return pool
+
+        # themes without matches (or without hints) fall back to all tropes
+        pool = self._by_parent.get(parent_id)
+        if not pool:
+            raise ValueError(f"No child tropes mapped to parent {parent_id}")
+        return pool
+
+    def select(self, parent_id: str, biome_theme: str, rng: random.Random) -> TropeChild:
+        return rng.choice(self.candidates(parent_id, biome_theme))
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from p4_core.archetype import ArchetypeParent
+from p4_core.terrain_map import TerrainMap
+from p4_core.trope import TropeChild
+from p4_loaders.archetype_loader import ArchetypeLoader
+from p4_loaders.terrain_loader import TerrainLoader
+from p4_loaders.trope_loader import TropeLoader
+
+logger = logging.getLogger(__name__)
+
+# Maps at least this large are parsed in a worker process; JSON decoding is
+# CPU-bound and holds the GIL, so threads would not overlap it.
+PROCESS_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class LoadReport:
+    path: Path
+    kind: str  # "parents" | "tropes" | "terrain"
+    executor: str  # "thread" | "process"
+    seconds: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class Phase1Inputs:
+    parents: List[ArchetypeParent]
+    tropes: List[TropeChild]
+    maps: List[TerrainMap]
+    reports: List[LoadReport] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - t0
+
+
+def _load_map_in_process(path: str, loader_kwargs: Dict[str, Any]) -> Tuple[Optional[TerrainMap], float]:
+    """
+    Returns (map, seconds), or (None, seconds) when the compiled map is
+    verified to be in the cache: the parent then re-opens it memory-mapped
+    instead of unpickling a copy of every column. If the cache write failed
+    the decoded map itself is returned, so nothing is parsed twice.
+    """
+    loader = TerrainLoader(**loader_kwargs)
+    terrain_map, seconds = _timed(partial(loader.load_map, path))
+    if loader.cache is not None and loader.cache.load(path) is not None:
+        return None, seconds
+    return terrain_map, seconds
+
+
+class ConcurrentLoader:
+    """
+    Phase 1 loading with every input in flight at once.
+
+    Large terrain maps go to a process pool, everything else (parents,
+    tropes, small or already cached maps) to a thread pool. Each file gets a
+    LoadReport with its own load time. A map that fails is logged and
+    skipped, like TerrainLoader.load_folder(); parents / tropes failures
+    propagate.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        use_cache: bool = True,
+        process_threshold: int = PROCESS_THRESHOLD_BYTES,
+        max_processes: Optional[int] = None,
+        max_threads: Optional[int] = None,
+    ):
+        self.loader_kwargs: Dict[str, Any] = {
+            "cache_dir": str(cache_dir) if cache_dir is not None else None,
+            "use_cache": use_cache,
+        }
+        self.process_threshold = process_threshold
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self.max_threads = max_threads or min(32, (os.cpu_count() or 1) + 4)
+
+    @contextmanager
+    def _executors(self, map_paths: Sequence[Path]) -> Iterator[Tuple[ThreadPoolExecutor, Callable]]:
+        """
+        Yields the thread pool and a submit_map(path) -> (path, executor,
+        future) helper; a process pool is only started for large maps.
+        """
+        loader = TerrainLoader(**self.loader_kwargs)
+        # a map with a fresh cache entry is only memory-mapped: no process
+        big = {
+            p for p in map_paths
+            if p.exists()
+            and p.stat().st_size >= self.process_threshold
+            and not (loader.cache is not None and loader.cache.is_fresh(p))
+        }
+
+        with ThreadPoolExecutor(max_workers=self.max_threads) as threads:
+            procs = None
+            if big and self.max_processes > 1:
+                procs = ProcessPoolExecutor(max_workers=min(self.max_processes, len(big)))
+
+            def submit_map(p: Path) -> Tuple[Path, str, Future]:
+                if procs is not None and p in big:
+                    return p, "process", procs.submit(_load_map_in_process, str(p), self.loader_kwargs)
+                return p, "thread", threads.submit(_timed, partial(loader.load_map, p))
+
+            try:
+                yield threads, submit_map
+            finally:
+                if procs is not None:
+                    procs.shutdown(wait=True)
+
+    def load_all(
+        self,
+        parents_path: str | Path,
+        tropes_path: str | Path,
+        map_paths: Sequence[str | Path] = (),
+    ) -> Phase1Inputs:
+        t0 = time.perf_counter()
+        map_paths = [Path(p) for p in map_paths]
+
+        with self._executors(map_paths) as (threads, submit_map):
+            parents_f = threads.submit(_timed, partial(ArchetypeLoader().load, parents_path))
+            tropes_f = threads.submit(_timed, partial(TropeLoader().load, tropes_path))
+            map_futures = [submit_map(p) for p in map_paths]
+
+            reports: List[LoadReport] = []
+            parents, seconds = parents_f.result()
+            reports.append(LoadReport(Path(parents_path), "parents", "thread", seconds))
+            tropes, seconds = tropes_f.result()
+            reports.append(LoadReport(Path(tropes_path), "tropes", "thread", seconds))
+
+            maps = self._collect_maps(map_futures, reports)
+
+        total = time.perf_counter() - t0
+        for r in reports:
+            logger.info("Loaded %s %s in %.3fs (%s)", r.kind, r.path.name, r.seconds, r.executor)
+        logger.info("Phase 1 inputs loaded in %.3fs wall", total)
+        return Phase1Inputs(parents=parents, tropes=tropes, maps=maps, reports=reports, seconds=total)
+
+    def load_folder(self, folder: str | Path) -> List[TerrainMap]:
+        """
+        Concurrent TerrainLoader.load_folder(): same file order and failure
+        policy.
+        """
+        folder = Path(folder)
+        if not folder.exists():
+            raise FileNotFoundError(f"Terrain folder not found: {folder}")
+
+        paths = sorted(folder.glob("*.json"))
+        with self._executors(paths) as (_, submit_map):
+            maps = self._collect_maps([submit_map(p) for p in paths], [])
+
+        logger.info("Loaded %d terrain maps from %s", len(maps), folder)
+        return maps
+
+    def _collect_maps(
+        self,
+        map_futures: List[Tuple[Path, str, Future]],
+        reports: List[LoadReport],
+    ) -> List[TerrainMap]:
+        maps: List[TerrainMap] = []
+        for p, executor, future in map_futures:
+            try:
+                terrain_map, seconds = future.result()
+                if terrain_map is None:
+                    terrain_map = self._open_cached(p)
+            except Exception as e:
+                logger.exception("Failed to load map %s: %s", p, e)
+                reports.append(LoadReport(p, "terrain", executor, 0.0, error=str(e)))
+                continue
+            maps.append(terrain_map)
+            reports.append(LoadReport(p, "terrain", executor, seconds))
+        return maps
+
+    def _open_cached(self, path: Path) -> TerrainMap:
+        # a worker stored this map; never fall back to parsing it again here
+        cache = TerrainLoader(**self.loader_kwargs).cache
+        terrain_map = cache.load(path) if cache is not None else None
+        if terrain_map is None:
+            raise RuntimeError(f"Terrain cache entry for {path} disappeared after it was written")
+        return terrain_map
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Container, Iterator, TextIO, Tuple
+
+_WS = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class _StreamReader:
+    """
+    Minimal pull reader over a text stream. Values are decoded with
+    json.JSONDecoder.raw_decode on a sliding buffer, so only the value
+    currently being decoded (plus one chunk) is held in memory.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.consumed = 0
+        self.eof = False
+
+    def _fill(self, size: int) -> None:
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return
+        self.consumed += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def _skip_ws(self) -> None:
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return
+            self._fill(self.chunk_size)
+
+    def _error(self, msg: str) -> ValueError:
+        return ValueError(f"{msg} at char {self.consumed + self.pos}")
+
+    def next_char(self) -> str:
+        self._skip_ws()
+        if self.pos >= len(self.buf):
+            raise self._error("Unexpected end of JSON input")
+        ch = self.buf[self.pos]
+        self.pos += 1
+        return ch
+
+    def peek(self) -> str:
+        self._skip_ws()
+        return self.buf[self.pos] if self.pos < len(self.buf) else ""
+
+    def expect(self, ch: str) -> None:
+        got = self.next_char()
+        if got != ch:
+            raise self._error(f"Expected {ch!r}, got {got!r}")
+
+    def expect_end(self) -> None:
+        if self.peek():
+            raise self._error("Unexpected data after JSON value")
+
+    def decode(self) -> Any:
+        self._skip_ws()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A value ending exactly at the buffer edge may be truncated
+                # (e.g. a number); only trust it once a delimiter follows.
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            self._fill(size)
+            size *= 2
+
+
+def iter_object_members(
+    f: TextIO,
+    stream_keys: Container[str] = (),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[str, bool, Any]]:
+    """
+    Incrementally parses a top-level JSON object.
+
+    Yields (key, is_item, value). Members whose key is in `stream_keys` and
+    whose value is an array are yielded element by element (is_item=True);
+    every other member is yielded whole.
+    """
+    r = _StreamReader(f, chunk_size)
+
+    if r.next_char() != "{":
+        raise ValueError("Expected a JSON object at top level")
+    if r.peek() == "}":
+        r.expect("}")
+        r.expect_end()
+        return
+
+    while True:
+        key = r.decode()
+        if not isinstance(key, str):
+            raise r._error("Expected object key")
+        r.expect(":")
+
+        if key in stream_keys and r.peek() == "[":
+            r.expect("[")
+            if r.peek() == "]":
+                r.expect("]")
+            else:
+                while True:
+                    yield key, True, r.decode()
+                    ch = r.next_char()
+                    if ch == "]":
+                        break
+                    if ch != ",":
+                        raise r._error(f"Expected ',' or ']', got {ch!r}")
+        else:
+            yield key, False, r.decode()
+
+        ch = r.next_char()
+        if ch == "}":
+            r.expect_end()
+            return
+        if ch != ",":
+            raise r._error(f"Expected ',' or '}}', got {ch!r}")
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+import numpy as np
+
+from p4_core.terrain_map import TERRAIN_COLUMNS, TerrainMap
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever ingestion rules (patching, column layout) change.
+CACHE_FORMAT_VERSION = 2
+
+HEADER_NAME = "header.json"
+
+
+class TerrainCache:
+    """
+    Compiled on-disk copy of terrain maps.
+
+    Each map is stored as one .npy file per column (memory-mapped on load)
+    plus a small JSON header with the map name, meta and a fingerprint of
+    the source file. An entry is reused while the source's size and mtime
+    match; if only the mtime moved, the content hash decides.
+
+    Files are replaced atomically (written to a uniquely named temp file
+    next to their target, then renamed), so processes that still have an
+    older entry memory-mapped keep reading the old, unchanged data, and
+    concurrent writers never share a temp file.
+    """
+
+    def __init__(self, cache_dir: str | Path):
+        self.cache_dir = Path(cache_dir)
+
+    def entry_dir(self, source: str | Path) -> Path:
+        source = Path(source).resolve()
+        key = hashlib.sha1(str(source).encode("utf-8")).hexdigest()[:12]
+        return self.cache_dir / f"{source.stem}-{key}"
+
+    # -------------------------------------------------
+    # Read
+    # -------------------------------------------------
+    def is_fresh(self, source: str | Path) -> bool:
+        """
+        True if load() would find a current entry, without opening columns.
+        """
+        return self._fresh_header(Path(source)) is not None
+
+    def load(self, source: str | Path) -> Optional[TerrainMap]:
+        source = Path(source)
+        header = self._fresh_header(source)
+        if header is None:
+            return None
+
+        entry = self.entry_dir(source)
+        try:
+            present = np.load(entry / "present.npy", mmap_mode="r")
+            columns = {
+                col: np.load(entry / f"{col}.npy", mmap_mode="r")
+                for col in TERRAIN_COLUMNS
+            }
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring damaged terrain cache %s: %s", entry, e)
+            return None
+
+        logger.info("Loaded terrain map '%s' from cache %s", header["name"], entry)
+        return TerrainMap(
+            name=header["name"],
+            meta=header["meta"],
+            origin=tuple(header["origin"]),
+            present=present,
+            columns=columns,
+            extras={(x, y): extra for x, y, extra in header.get("extras", [])},
+        )
+
+    def _fresh_header(self, source: Path) -> Optional[Dict[str, Any]]:
+        header_path = self.entry_dir(source) / HEADER_NAME
+        if not header_path.exists():
+            return None
+
+        try:
+            with header_path.open("r", encoding="utf-8") as f:
+                header = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Ignoring unreadable terrain cache header %s: %s", header_path, e)
+            return None
+
+        if header.get("version") != CACHE_FORMAT_VERSION:
+            logger.info("Terrain cache for %s has an old format; rebuilding", source.name)
+            return None
+
+        if not self._is_fresh(source, header, header_path):
+            logger.info("Terrain cache for %s is stale; rebuilding", source.name)
+            return None
+        return header
+
+    def _is_fresh(self, source: Path, header: Dict[str, Any], header_path: Path) -> bool:
+        try:
+            st = source.stat()
+        except OSError:
+            return False
+
+        if st.st_size != header.get("source_size"):
+            return False
+        if st.st_mtime_ns == header.get("source_mtime_ns"):
+            return True
+
+        # Touched but possibly unchanged: fall back to the content hash.
+        if _file_sha256(source) != header.get("source_sha256"):
+            return False
+
+        header["source_mtime_ns"] = st.st_mtime_ns
+        try:
+            _write_json_atomic(header_path, header)
+        except OSError:
+            pass
+        return True
+
+    # -------------------------------------------------
+    # Write
+    # -------------------------------------------------
+    def store(
+        self,
+        source: str | Path,
+        terrain_map: TerrainMap,
+        source_stat: Optional[os.stat_result] = None,
+    ) -> Optional[Path]:
+        """
+        `source_stat` is the source's stat taken before it was parsed; if
+        the file changed since, nothing is cached (returns None), so an edit
+        made during the parse is never stamped as fresh.
+        """
+        source = Path(source)
+        st = source_stat or source.stat()
+        # hash first, then check the file still matches what was parsed
+        sha256 = _file_sha256(source)
+        now = source.stat()
+        if (now.st_size, now.st_mtime_ns) != (st.st_size, st.st_mtime_ns):
+            logger.info("Terrain map %s changed while loading; not caching it", source.name)
+            return None
+
+        entry = self.entry_dir(source)
+        entry.mkdir(parents=True, exist_ok=True)
+
+        # Header goes last: an entry without one is never read.
+        header_path = entry / HEADER_NAME
+        header_path.unlink(missing_ok=True)
+
+        _save_npy_atomic(entry / "present.npy", terrain_map.present)
+        for col in TERRAIN_COLUMNS:
+            _save_npy_atomic(entry / f"{col}.npy", terrain_map.columns[col])
+
+        _write_json_atomic(header_path, {
+            "version": CACHE_FORMAT_VERSION,
+            "name": terrain_map.name,
+            "meta": terrain_map.meta,
+            "origin": list(terrain_map.origin),
+            "extras": [[x, y, extra] for (x, y), extra in terrain_map.extras.items()],
+            "source_size": st.st_size,
+            "source_mtime_ns": st.st_mtime_ns,
+            "source_sha256": sha256,
+        })
+
+        logger.info("Wrote terrain cache for '%s' → %s", terrain_map.name, entry)
+        return entry
+
+
+def _file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _replace_atomic(path: Path, write: Callable[[BinaryIO], None]) -> None:
+    # Never write into a file another process may have memory-mapped, and
+    # never share a temp file with a concurrent writer.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _save_npy_atomic(path: Path, arr: np.ndarray) -> None:
+    _replace_atomic(path, lambda f: np.save(f, np.ascontiguousarray(arr)))
+
+
+def _write_json_atomic(path: Path, payload: Dict[str, Any]) -> None:
+    _replace_atomic(path, lambda f: f.write(json.dumps(payload).encode("utf-8")))
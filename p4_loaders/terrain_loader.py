@@ -2,34 +2,229 @@ from __future__ import annotations
 
 import json
 import logging
-from dataclasses import dataclass
+from array import array
 from pathlib import Path
-from typing import Dict, Tuple, Optional, Any, List, Iterable
+from typing import Dict, Optional, Any, List, Tuple
 
-from p4_core.world_cell import WorldCell
+import numpy as np
+
+from p4_core.terrain_map import (
+    COLUMN_DTYPES,
+    FLAG_COLUMNS,
+    FLOAT_COLUMNS,
+    GEO_FIELDS,
+    HEURISTIC_FIELDS,
+    TERRAIN_COLUMNS,
+    TerrainMap,
+)
+from p4_loaders.json_stream import DEFAULT_CHUNK_SIZE, iter_object_members
+from p4_loaders.terrain_cache import TerrainCache
 
 logger = logging.getLogger(__name__)
 
+# Maps at least this large are ingested record by record.
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+# Dense columns cover the cells' bounding box. A box may hold at most this
+# many cells per actual cell (plus a fixed allowance for small maps); more
+# means outlier coordinates, which would otherwise allocate gigabytes.
+MAX_BBOX_CELLS_PER_CELL = 4
+MIN_BBOX_ALLOWANCE = 1 << 20
+
 
-@dataclass(frozen=True)
-class TerrainMap:
+class TerrainColumnBuilder:
     """
-    In-memory terrain grid indexed by (x, y).
+    Accumulates grid records into compact typed buffers, then scatters them
+    into dense columns. Applies the latitude override patch on ingestion.
     """
-    name: str
-    meta: Dict[str, Any]
-    cells: Dict[Tuple[int, int], WorldCell]
 
-    def get_cell(self, x: int, y: int) -> Optional[WorldCell]:
-        return self.cells.get((x, y))
+    def __init__(self, north_lat: Optional[float] = None):
+        self.north_lat = north_lat
+        self.patched = 0
+        self._xs = array("q")
+        self._ys = array("q")
+        self._extras: Dict[Tuple[int, int], Dict[str, Dict[str, Any]]] = {}
+        self._buffers = {
+            **{c: array("d") for c in FLOAT_COLUMNS},
+            "biome_code": array("h"),
+            **{c: array("b") for c in FLAG_COLUMNS},
+        }
+
+    def __len__(self) -> int:
+        return len(self._xs)
+
+    def add(self, row: Any) -> bool:
+        if not isinstance(row, dict):
+            return False
+
+        x = row.get("x")
+        y = row.get("y")
+        geo = row.get("geo_data") or {}
+        heur = row.get("game_heuristics")
+
+        if not isinstance(x, int) or not isinstance(y, int):
+            return False
+        if not isinstance(geo, dict):
+            geo = {}
+        if not isinstance(heur, dict):
+            heur = {}
+
+        # --- LATITUDE OVERRIDE PATCH (ingestion-time) ---
+        biome_code_int = _opt_code(geo.get("biome_code"))
+
+        north_lat = self.north_lat
+        if north_lat is not None and (north_lat > 65 or north_lat < -60):
+            if biome_code_int == 10:
+                biome_code_int = 100
+                self.patched += 1
+
+        b = self._buffers
+        self._xs.append(x)
+        self._ys.append(y)
+        b["elevation"].append(_opt_float(geo.get("elevation")))
+        b["roughness"].append(_opt_float(geo.get("roughness")))
+        b["human_density"].append(_opt_float(geo.get("human_density")))
+        b["movement_cost"].append(_opt_float(heur.get("movement_cost")))
+        b["biome_code"].append(-1 if biome_code_int is None else biome_code_int)
+        b["is_water"].append(_opt_flag(geo.get("is_water")))
+        b["buildable"].append(_opt_flag(heur.get("buildable")))
+
+        # keys without a column are kept as-is, per cell
+        extra = {}
+        for section, values, known in (("geo_data", geo, GEO_FIELDS), ("game_heuristics", heur, HEURISTIC_FIELDS)):
+            unknown = {k: v for k, v in values.items() if k not in known}
+            if unknown:
+                extra[section] = unknown
+        if extra:
+            self._extras[(x, y)] = extra
+        elif self._extras:
+            self._extras.pop((x, y), None)
+        return True
+
+    def patch_staged(self, north_lat: Optional[float]) -> None:
+        """
+        Applies the latitude override to records staged before the map's
+        meta was known (streamed files may list `grid` before `meta`).
+        """
+        if north_lat is None or not (north_lat > 65 or north_lat < -60):
+            return
+        codes = np.asarray(memoryview(self._buffers["biome_code"]))
+        hit = codes == 10
+        codes[hit] = 100
+        self.patched += int(np.count_nonzero(hit))
+
+    def build(self, name: str, meta: Dict[str, Any]) -> TerrainMap:
+        xs = np.frombuffer(self._xs, dtype=np.int64) if len(self._xs) else np.zeros(0, dtype=np.int64)
+        ys = np.frombuffer(self._ys, dtype=np.int64) if len(self._ys) else np.zeros(0, dtype=np.int64)
+
+        if len(xs):
+            x0, y0 = int(xs.min()), int(ys.min())
+            width = int(xs.max()) - x0 + 1
+            height = int(ys.max()) - y0 + 1
+        else:
+            x0 = y0 = width = height = 0
+
+        limit = MAX_BBOX_CELLS_PER_CELL * len(xs) + MIN_BBOX_ALLOWANCE
+        if width * height > limit:
+            raise ValueError(
+                f"Terrain map {name}: {len(xs)} cells span a {width}x{height} bounding box "
+                f"(x {x0}..{x0 + width - 1}, y {y0}..{y0 + height - 1}); too sparse for dense "
+                f"columns (limit {limit} cells), check for outlier coordinates"
+            )
+
+        rows = ys - y0
+        cols = xs - x0
+
+        present = np.zeros((height, width), dtype=bool)
+        present[rows, cols] = True
+
+        columns: Dict[str, np.ndarray] = {}
+        for col in TERRAIN_COLUMNS:
+            dtype = COLUMN_DTYPES[col]
+            fill = np.nan if col in FLOAT_COLUMNS else -1
+            grid = np.full((height, width), fill, dtype=dtype)
+            buf = self._buffers[col]
+            if len(buf):
+                grid[rows, cols] = np.frombuffer(buf, dtype=dtype)
+            columns[col] = grid
+            # release the staging buffer as soon as the column is dense
+            self._buffers[col] = array(buf.typecode)
+
+        extras, self._extras = self._extras, {}
+        return TerrainMap(name=name, meta=meta, origin=(x0, y0), present=present, columns=columns, extras=extras)
+
+
+def _opt_float(v: Any) -> float:
+    if v is None:
+        return float("nan")
+    try:
+        return float(v)
+    except Exception:
+        return float("nan")
+
+
+def _opt_code(v: Any) -> Optional[int]:
+    if v is None:
+        return None
+    try:
+        code = int(v)
+    except Exception:
+        return None
+    return code if 0 <= code <= np.iinfo(np.int16).max else None
+
+
+def _opt_flag(v: Any) -> int:
+    if v is None:
+        return -1
+    return 1 if v else 0
 
 
 class TerrainLoader:
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        use_cache: bool = True,
+        stream_threshold: Optional[int] = STREAM_THRESHOLD_BYTES,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """
+        The compiled-map cache is opt-in: with a `cache_dir` (and use_cache),
+        compiled maps are kept there and reused while the source is
+        unchanged. Without one, every load parses the source.
+
+        Files larger than `stream_threshold` bytes are parsed record by
+        record instead of with json.load (0 streams everything, None never).
+        """
+        self.cache = TerrainCache(cache_dir) if use_cache and cache_dir is not None else None
+        self.stream_threshold = stream_threshold
+        self.chunk_size = chunk_size
+
     def load_map(self, path: str | Path) -> TerrainMap:
         path = Path(path)
         if not path.exists():
             raise FileNotFoundError(f"Terrain map not found: {path}")
 
+        if self.cache is not None:
+            cached = self.cache.load(path)
+            if cached is not None:
+                return cached
+
+        # stat before reading: the cache stamps the entry with this state
+        st = path.stat()
+        if self.stream_threshold is not None and st.st_size >= self.stream_threshold:
+            terrain_map = self._stream_map(path)
+        else:
+            terrain_map = self._parse_map(path)
+
+        if self.cache is not None:
+            try:
+                self.cache.store(path, terrain_map, source_stat=st)
+            except OSError as e:
+                logger.warning("Could not write terrain cache for %s: %s", path, e)
+
+        return terrain_map
+
+    def _parse_map(self, path: Path) -> TerrainMap:
         logger.info("Loading terrain map from %s", path)
 
         with path.open("r", encoding="utf-8") as f:
@@ -48,47 +243,55 @@ class TerrainLoader:
         if not isinstance(grid, list):
             raise ValueError(f"Expected grid list in {path}, got {type(grid)}")
 
-        north_lat = _read_north_lat(meta)
+        builder = TerrainColumnBuilder(north_lat=_read_north_lat(meta))
+        for row in grid:
+            builder.add(row)
 
-        cells: Dict[Tuple[int, int], WorldCell] = {}
-        patched = 0
+        return self._finish(builder, meta, path)
 
-        for row in grid:
-            if not isinstance(row, dict):
-                continue
-
-            x = row.get("x")
-            y = row.get("y")
-            geo = row.get("geo_data") or {}
-            heur = row.get("game_heuristics")
-
-            if not isinstance(x, int) or not isinstance(y, int):
-                continue
-            if not isinstance(geo, dict):
-                geo = {}
-
-            # --- LATITUDE OVERRIDE PATCH (ingestion-time) ---
-            biome_code = geo.get("biome_code")
-            biome_code_int = None
-            try:
-                biome_code_int = int(biome_code) if biome_code is not None else None
-            except Exception:
-                biome_code_int = None
+    def _stream_map(self, path: Path) -> TerrainMap:
+        """
+        Streaming ingestion: `grid` records go straight into the column
+        builder as they are decoded, so the decoded JSON is never held whole.
+        """
+        logger.info("Streaming terrain map from %s", path)
+
+        meta: Any = {}
+        builder = TerrainColumnBuilder()
+
+        with path.open("r", encoding="utf-8") as f:
+            for key, is_item, value in iter_object_members(f, ("grid",), self.chunk_size):
+                if key == "grid":
+                    if is_item:
+                        builder.add(value)
+                        continue
+                    if value is not None and not isinstance(value, list):
+                        raise ValueError(f"Expected grid list in {path}, got {type(value)}")
+                    for row in value or []:
+                        builder.add(row)
+                elif key == "meta":
+                    meta = value
+                    if len(builder) == 0 and isinstance(meta, dict):
+                        builder.north_lat = _read_north_lat(meta)
+
+        meta = meta or {}
+        if not isinstance(meta, dict):
+            logger.warning("meta is not a dict in %s; forcing empty meta", path)
+            meta = {}
 
-            if north_lat is not None and (north_lat > 65 or north_lat < -60):
-                if biome_code_int == 10:
-                    geo["biome_code"] = 100
-                    patched += 1
+        if builder.north_lat is None:
+            builder.patch_staged(_read_north_lat(meta))
 
-            cell = WorldCell(x=x, y=y, geo_data=geo, game_heuristics=heur if isinstance(heur, dict) else None)
-            cells[(x, y)] = cell
+        return self._finish(builder, meta, path)
 
+    def _finish(self, builder: TerrainColumnBuilder, meta: Dict[str, Any], path: Path) -> TerrainMap:
         name = str(meta.get("project_name") or path.stem)
-        if patched > 0:
-            logger.warning("Applied latitude override patch to %d cells in %s", patched, name)
+        if builder.patched > 0:
+            logger.warning("Applied latitude override patch to %d cells in %s", builder.patched, name)
 
-        logger.info("Loaded terrain map '%s' with %d cells", name, len(cells))
-        return TerrainMap(name=name, meta=meta, cells=cells)
+        terrain_map = builder.build(name=name, meta=meta)
+        logger.info("Loaded terrain map '%s' with %d cells", name, len(terrain_map.cells))
+        return terrain_map
 
     def load_folder(self, folder: str | Path) -> List[TerrainMap]:
         """
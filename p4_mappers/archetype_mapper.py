@@ -1,68 +1,303 @@
 from __future__ import annotations
 
 import logging
+from collections import Counter
+
 import numpy as np
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional, Tuple
 
 from p4_core.archetype import ArchetypeParent
 from p4_core.trope import TropeChild
-from p4_embeddings.embedder import MiniLMEmbedder
-from p4_mappers.mapping_config import MAPPING_THRESHOLD
+from p4_embeddings.base import Embedder
+from p4_mappers.mapping_config import (
+    MAPPING_MEMORY_BUDGET_MB,
+    MAPPING_THRESHOLD,
+    MAPPING_TOP_K,
+)
+from p4_mappers.mapping_fingerprint import MappingFingerprint
+from p4_mappers.mapping_scores import MappingScores, top_k
+from p4_mappers.mapping_text import parent_text, child_text, child_fields
 
 logger = logging.getLogger(__name__)
 
 
 class ArchetypeMapper:
-    def __init__(self, embedder: MiniLMEmbedder):
+    def __init__(
+        self,
+        embedder: Embedder,
+        memory_budget_mb: float = MAPPING_MEMORY_BUDGET_MB,
+        field_weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        field_weights: per-field weights for child embeddings (each field is
+        embedded separately and the vectors are blended), e.g.
+        CHILD_TEXT_WEIGHTS. Opt-in: the default None embeds the joined
+        "raw name description" string, as the committed artifact does.
+        Weighted mode embeds about twice as many strings and has no
+        committed quality comparison yet.
+        """
         self.embedder = embedder
+        self.memory_budget_mb = memory_budget_mb
+        self.field_weights = dict(field_weights) if field_weights else None
+
+    def chunk_rows(self, dim: int, n_parents: int) -> int:
+        """
+        Children per chunk so that the chunk's embeddings and score matrix
+        (float32) stay within the memory budget.
+        """
+        bytes_per_row = 4 * (dim + n_parents)
+        budget = int(self.memory_budget_mb * 1024 * 1024)
+        return max(1, budget // max(1, bytes_per_row))
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.embedder, "model_name", type(self.embedder).__name__)
+
+    def fingerprint(self, parents: List[ArchetypeParent], children: List[TropeChild]) -> MappingFingerprint:
+        return MappingFingerprint.compute(parents, children, self.model_name, self.field_weights)
 
     def map_children_to_parents(
         self,
         parents: List[ArchetypeParent],
         children: List[TropeChild],
     ) -> List[Dict]:
+        results = self.score_children(parents, children).to_rows()
 
-        logger.info("Embedding parent archetypes...")
-        parent_texts = [
-            f"{p.name}. {p.primary_goal or ''} {p.primary_fear or ''}"
-            for p in parents
-        ]
-        parent_embeddings = self.embedder.embed(parent_texts)
+        low_conf = sum(1 for r in results if r["review_needed"])
+        logger.info(
+            "Mapping complete. Low-confidence mappings: %d / %d",
+            low_conf, len(results)
+        )
 
-        results = []
+        return results
+
+    def score_children(
+        self,
+        parents: List[ArchetypeParent],
+        children: List[TropeChild],
+        k: int = MAPPING_TOP_K,
+    ) -> MappingScores:
+        """
+        Scores every child against every parent and keeps the top-k parents
+        per child; mapping rows are derived from the result.
+        """
+        parent_embeddings = self._embed_parents(parents)
 
         logger.info("Mapping %d child tropes → parents", len(children))
 
-        for child in children:
-            child_text = " ".join(
-                t for t in [
-                    child.parent_archetype_raw,
-                    child.name,
-                    child.description,
-                ]
-                if t
-            )
-
-            child_emb = self.embedder.embed(child_text)[0]
-            scores = np.dot(parent_embeddings, child_emb)
-
-            best_idx = int(np.argmax(scores))
-            best_score = float(scores[best_idx])
-            best_parent = parents[best_idx]
-
-            results.append({
-                "child_id": child.id,
-                "child_name": child.name,
-                "resolved_parent_id": best_parent.id,
-                "resolved_parent_name": best_parent.name,
-                "confidence_score": round(best_score, 4),
-                "review_needed": best_score < MAPPING_THRESHOLD,
-            })
+        k = min(k, len(parents))
+        top_idx = np.full((len(children), k), -1, dtype=np.int32)
+        top_scores = np.full((len(children), k), np.nan, dtype=np.float32)
+
+        for start, scores in self._score_chunks(parent_embeddings, children):
+            end = start + len(scores)
+            top_idx[start:end], top_scores[start:end] = top_k(scores, k)
+
+        return _scores(parents, children, top_idx, top_scores)
+
+    def remap_incremental(
+        self,
+        parents: List[ArchetypeParent],
+        children: List[TropeChild],
+        previous_rows: List[Dict],
+        previous: Optional[MappingFingerprint],
+        previous_scores: Optional[MappingScores] = None,
+        k: int = MAPPING_TOP_K,
+        threshold: float = MAPPING_THRESHOLD,
+    ) -> Tuple[List[Dict], MappingFingerprint, MappingScores, Dict[str, int]]:
+        """
+        Re-maps only what changed since `previous`:
+          - new or edited tropes are fully re-scored;
+          - rows whose resolved parent was edited or removed, or whose
+            stored top-k lists a removed parent, are re-scored;
+          - if parents were added or edited, the remaining rows are scored
+            again against the whole parent list.
+        Every other row keeps its stored top-k. Rows (and review flags, at
+        `threshold`) are derived from the merged top-k, so the result equals
+        a full remap.
+        Returns (rows in catalog order, new fingerprint, top-k scores, stats).
+        """
+        current = self.fingerprint(parents, children)
+
+        if (
+            previous is None
+            or previous.model_name != current.model_name
+            or previous.text_mode != current.text_mode
+        ):
+            logger.info("No compatible fingerprint; running full mapping")
+            scores = self.score_children(parents, children, k)
+            rows = scores.to_rows(threshold)
+            return rows, current, scores, {"rescored": len(rows), "checked": 0, "removed": 0, "full": 1}
+
+        old_rows = {r["child_id"]: r for r in previous_rows}
+
+        changed_parents = {
+            pid for pid, h in current.parents.items()
+            if previous.parents.get(pid) != h
+        }
+        removed_parents = set(previous.parents) - set(current.parents)
+        stale_parents = changed_parents | removed_parents
+        # rows whose stored candidates would have a hole where a parent was
+        lost = previous_scores.children_of(removed_parents) if previous_scores and removed_parents else set()
+
+        rescore: List[int] = []
+        check: List[int] = []
+        for i, c in enumerate(children):
+            old = old_rows.get(c.id)
+            if (
+                old is None
+                or previous.children.get(c.id) != current.children[c.id]
+                or old["resolved_parent_id"] in stale_parents
+                or c.id in lost
+            ):
+                rescore.append(i)
+            elif changed_parents:
+                check.append(i)
+
+        removed = len(set(old_rows) - set(current.children))
+        k = min(k, len(parents))
+        fresh: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        todo = rescore + check
+        if todo:
+            parent_embeddings = self._embed_parents(parents)
+            for start, scores in self._score_chunks(parent_embeddings, [children[i] for i in todo]):
+                idx, top = top_k(scores, k)
+                for j in range(len(scores)):
+                    fresh[children[todo[start + j]].id] = (idx[j], top[j])
 
-        low_conf = sum(1 for r in results if r["review_needed"])
         logger.info(
-            "Mapping complete. Low-confidence mappings: %d / %d",
-            low_conf, len(results)
+            "Incremental remap: %d rows re-scored, %d checked against %d changed parents, %d removed",
+            len(rescore), len(check), len(changed_parents), removed,
         )
 
-        return results
+        scores = self._merge_scores(parents, children, old_rows, fresh, previous_scores, k)
+        rows = scores.to_rows(threshold)
+        stats = {"rescored": len(rescore), "checked": len(check), "removed": removed, "full": 0}
+        return rows, current, scores, stats
+
+    @staticmethod
+    def _merge_scores(
+        parents: List[ArchetypeParent],
+        children: List[TropeChild],
+        old_rows: Dict[str, Dict],
+        fresh: Dict[str, Tuple[np.ndarray, np.ndarray]],
+        previous_scores: Optional[MappingScores],
+        k: int,
+    ) -> MappingScores:
+        """
+        Top-k table for the updated catalog: fresh scores where rows were
+        (re)scored, the previous sidecar otherwise, and the row's stored
+        resolved parent as a last resort (no sidecar).
+        """
+        kept = previous_scores.rows_for([p.id for p in parents], k) if previous_scores else {}
+        position = {p.id: j for j, p in enumerate(parents)}
+
+        top_idx = np.full((len(children), k), -1, dtype=np.int32)
+        top_scores = np.full((len(children), k), np.nan, dtype=np.float32)
+
+        for i, child in enumerate(children):
+            entry = fresh.get(child.id) or kept.get(child.id)
+            if entry is not None and entry[0][0] >= 0:
+                top_idx[i], top_scores[i] = entry
+            else:
+                row = old_rows[child.id]
+                top_idx[i, 0] = position[row["resolved_parent_id"]]
+                top_scores[i, 0] = row["confidence_score"]
+
+        return _scores(parents, children, top_idx, top_scores)
+
+    # -------------------------------------------------
+    # Scoring
+    # -------------------------------------------------
+    def _embed_parents(self, parents: List[ArchetypeParent]) -> np.ndarray:
+        logger.info("Embedding parent archetypes...")
+        return np.asarray(
+            self.embedder.embed([parent_text(p) for p in parents]),
+            dtype=np.float32,
+        )
+
+    def _score_chunks(
+        self,
+        parent_embeddings: np.ndarray,
+        children: List[TropeChild],
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Embeds children chunk by chunk and scores each chunk against all
+        parents with one matrix multiply. Yields (start, scores[chunk, parents]).
+        """
+        chunk = self.chunk_rows(parent_embeddings.shape[1], parent_embeddings.shape[0])
+
+        # Field strings used by several tropes (e.g. parent_archetype_raw
+        # synonyms) are embedded once for the whole run.
+        shared: Dict[str, Optional[np.ndarray]] = {}
+        if self.field_weights:
+            counts = Counter(t for c in children for _, t in child_fields(c, self.field_weights))
+            shared = {t: None for t, n in counts.items() if n > 1}
+
+        for start in range(0, len(children), chunk):
+            batch = children[start:start + chunk]
+            if self.field_weights:
+                child_embeddings = self._embed_weighted(batch, shared)
+            else:
+                texts = [child_text(c) for c in batch]
+                child_embeddings = np.asarray(self.embedder.embed(texts), dtype=np.float32)
+            yield start, child_embeddings @ parent_embeddings.T
+
+    def _embed_weighted(
+        self,
+        children: List[TropeChild],
+        shared: Dict[str, Optional[np.ndarray]],
+    ) -> np.ndarray:
+        """
+        Weighted blend of per-field embeddings, re-normalised per child.
+        Each distinct string is sent to the model at most once. Children
+        with no non-empty field get a zero row (score 0 against every
+        parent).
+        """
+        fields = [child_fields(c, self.field_weights) for c in children]
+
+        pending: Dict[str, int] = {}
+        for pairs in fields:
+            for _, text in pairs:
+                if shared.get(text) is None and text not in pending:
+                    pending[text] = len(pending)
+
+        vectors: Dict[str, np.ndarray] = {}
+        if pending:
+            embedded = np.asarray(self.embedder.embed(list(pending)), dtype=np.float32)
+            for text, row in pending.items():
+                vectors[text] = embedded[row]
+                if text in shared:
+                    shared[text] = embedded[row]
+
+        out = np.zeros((len(children), self.embedder.embedding_dim()), dtype=np.float32)
+        for i, pairs in enumerate(fields):
+            total = sum(self.field_weights[f] for f, _ in pairs)
+            for field, text in pairs:
+                vec = shared.get(text)
+                if vec is None:
+                    vec = vectors[text]
+                out[i] += (self.field_weights[field] / total) * vec
+
+        if getattr(self.embedder, "normalize", True):
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+def _scores(
+    parents: List[ArchetypeParent],
+    children: List[TropeChild],
+    top_idx: np.ndarray,
+    top_scores: np.ndarray,
+) -> MappingScores:
+    return MappingScores(
+        child_ids=[c.id for c in children],
+        child_names=[c.name for c in children],
+        parent_ids=[p.id for p in parents],
+        parent_names=[p.name for p in parents],
+        top_idx=top_idx,
+        top_scores=top_scores,
+    )
+
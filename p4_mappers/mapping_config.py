@@ -8,3 +8,9 @@ CHILD_TEXT_WEIGHTS = {
     "name": 0.3,
     "description": 0.2,
 }
+
+# Upper bound for one chunk of child embeddings + scores during mapping
+MAPPING_MEMORY_BUDGET_MB = 256
+
+# Parent candidates kept per child in the score sidecar
+MAPPING_TOP_K = 5
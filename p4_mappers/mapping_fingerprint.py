@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from p4_core.archetype import ArchetypeParent
+from p4_core.trope import TropeChild
+from p4_mappers.mapping_text import parent_text, child_signature, text_mode
+
+FINGERPRINT_VERSION = 1
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def fingerprint_path(mapping_path: str | Path) -> Path:
+    mapping_path = Path(mapping_path)
+    return mapping_path.with_name(mapping_path.stem + ".fingerprint.json")
+
+
+@dataclass(frozen=True)
+class MappingFingerprint:
+    """
+    Hashes of the exact texts that were embedded to build a mapping
+    artifact, so a later run can tell which parents / tropes changed.
+    """
+    model_name: str
+    parents: Dict[str, str]
+    children: Dict[str, str]
+    text_mode: str = "joined"
+
+    @classmethod
+    def compute(
+        cls,
+        parents: List[ArchetypeParent],
+        children: List[TropeChild],
+        model_name: str,
+        field_weights: Optional[Dict[str, float]] = None,
+    ) -> "MappingFingerprint":
+        return cls(
+            model_name=model_name,
+            parents={p.id: _digest(parent_text(p)) for p in parents},
+            children={c.id: _digest(child_signature(c, field_weights)) for c in children},
+            text_mode=text_mode(field_weights),
+        )
+
+    def save(self, path: str | Path) -> None:
+        with Path(path).open("w", encoding="utf-8") as f:
+            json.dump({
+                "version": FINGERPRINT_VERSION,
+                "model_name": self.model_name,
+                "parents": self.parents,
+                "children": self.children,
+                "text_mode": self.text_mode,
+            }, f)
+
+    @classmethod
+    def load(cls, path: str | Path) -> Optional["MappingFingerprint"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != FINGERPRINT_VERSION:
+            return None
+        return cls(
+            model_name=data["model_name"],
+            parents=data["parents"],
+            children=data["children"],
+            text_mode=data.get("text_mode", "joined"),
+        )
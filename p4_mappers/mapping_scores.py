@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from p4_mappers.mapping_config import MAPPING_THRESHOLD
+
+SCORES_VERSION = 1
+
+
+def scores_path(mapping_path: str | Path) -> Path:
+    mapping_path = Path(mapping_path)
+    return mapping_path.with_name(mapping_path.stem + ".scores.npz")
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise top-k (descending). Ties keep the lower parent index first, so
+    column 0 always equals np.argmax.
+    """
+    k = min(k, scores.shape[1])
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return order.astype(np.int32), np.take_along_axis(scores, order, axis=1).astype(np.float32)
+
+
+@dataclass(frozen=True)
+class MappingScores:
+    """
+    Top-k parent candidates per child trope, kept next to the mapping JSON
+    as a small .npz so thresholds, review flags and secondary parents can
+    be recomputed without the embedding model.
+
+    top_idx[i, j] indexes parent_ids (-1 = padding); top_scores[i, j] is the
+    matching cosine score (NaN for padding), sorted descending per row.
+    """
+    child_ids: List[str]
+    child_names: List[str]
+    parent_ids: List[str]
+    parent_names: List[str]
+    top_idx: np.ndarray
+    top_scores: np.ndarray
+
+    @property
+    def k(self) -> int:
+        return int(self.top_idx.shape[1])
+
+    def __len__(self) -> int:
+        return len(self.child_ids)
+
+    # -------------------------------------------------
+    # Persistence
+    # -------------------------------------------------
+    def save(self, path: str | Path) -> None:
+        with Path(path).open("wb") as f:
+            np.savez_compressed(
+                f,
+                version=np.array(SCORES_VERSION),
+                child_ids=np.array(self.child_ids, dtype=str),
+                child_names=np.array(self.child_names, dtype=str),
+                parent_ids=np.array(self.parent_ids, dtype=str),
+                parent_names=np.array(self.parent_names, dtype=str),
+                top_idx=self.top_idx,
+                top_scores=self.top_scores,
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> Optional["MappingScores"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != SCORES_VERSION:
+                return None
+            return cls(
+                child_ids=data["child_ids"].tolist(),
+                child_names=data["child_names"].tolist(),
+                parent_ids=data["parent_ids"].tolist(),
+                parent_names=data["parent_names"].tolist(),
+                top_idx=data["top_idx"],
+                top_scores=data["top_scores"],
+            )
+
+    # -------------------------------------------------
+    # Derived views (no model needed)
+    # -------------------------------------------------
+    @property
+    def best_scores(self) -> np.ndarray:
+        return self.top_scores[:, 0].astype(np.float64)
+
+    def review_mask(self, threshold: float = MAPPING_THRESHOLD) -> np.ndarray:
+        return self.best_scores < threshold
+
+    def sweep(self, thresholds: Iterable[float]) -> Dict[float, int]:
+        """
+        Number of rows flagged for review at each threshold.
+        """
+        best = np.sort(self.best_scores)
+        thresholds = list(thresholds)
+        counts = np.searchsorted(best, np.asarray(thresholds, dtype=np.float64), side="left")
+        return {t: int(c) for t, c in zip(thresholds, counts)}
+
+    def to_rows(self, threshold: float = MAPPING_THRESHOLD) -> List[Dict]:
+        """
+        Mapping rows in the config_archetypes_mapped.json layout.
+        """
+        best_idx = self.top_idx[:, 0].tolist()
+        best = self.best_scores.tolist()
+        return [
+            {
+                "child_id": self.child_ids[i],
+                "child_name": self.child_names[i],
+                "resolved_parent_id": self.parent_ids[p],
+                "resolved_parent_name": self.parent_names[p],
+                "confidence_score": round(score, 4),
+                "review_needed": score < threshold,
+            }
+            for i, (p, score) in enumerate(zip(best_idx, best))
+        ]
+
+    def secondary_parents(
+        self,
+        min_score: Optional[float] = None,
+        margin: Optional[float] = None,
+    ) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Runner-up parents per child: entries 2..k scoring at least
+        `min_score` and/or within `margin` of the child's best score.
+        """
+        keep = self.top_idx[:, 1:] >= 0
+        scores = self.top_scores[:, 1:]
+        if min_score is not None:
+            keep &= scores >= min_score
+        if margin is not None:
+            keep &= (self.top_scores[:, :1] - scores) <= margin
+
+        out: Dict[str, List[Tuple[str, float]]] = {}
+        for i, j in zip(*np.nonzero(keep)):
+            out.setdefault(self.child_ids[i], []).append(
+                (self.parent_ids[self.top_idx[i, j + 1]], round(float(scores[i, j]), 4))
+            )
+        return out
+
+    # -------------------------------------------------
+    # Incremental updates
+    # -------------------------------------------------
+    def children_of(self, parent_ids: Iterable[str]) -> Set[str]:
+        """
+        Ids of children with any of `parent_ids` among their top-k.
+        """
+        wanted = set(parent_ids)
+        hit = np.array([pid in wanted for pid in self.parent_ids] + [False])
+        rows = np.flatnonzero(hit[self.top_idx].any(axis=1))
+        return {self.child_ids[i] for i in rows}
+
+    def rows_for(self, parent_ids: List[str], k: int) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Per-child (idx, scores) re-indexed onto another parent list; entries
+        for parents that no longer exist are dropped and padded at the end.
+        """
+        position = {pid: j for j, pid in enumerate(parent_ids)}
+        remap = np.array([position.get(pid, -1) for pid in self.parent_ids] + [-1], dtype=np.int32)
+
+        idx = remap[self.top_idx]  # -1 padding maps to the trailing -1
+        out: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for i, child_id in enumerate(self.child_ids):
+            ok = idx[i] >= 0
+            out[child_id] = _pad(idx[i][ok], self.top_scores[i][ok], k)
+        return out
+
+
+def _pad(idx: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    out_idx = np.full(k, -1, dtype=np.int32)
+    out_scores = np.full(k, np.nan, dtype=np.float32)
+    n = min(k, len(idx))
+    out_idx[:n] = idx[:n]
+    out_scores[:n] = scores[:n]
+    return out_idx, out_scores
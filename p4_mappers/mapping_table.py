@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from p4_utils.packed_file import close_packed, pack_strings, packed_string, read_packed, write_packed
+
+TABLE_MAGIC = b"P4MAPTBL"
+TABLE_VERSION = 2
+
+
+def table_path(mapping_path: str | Path) -> Path:
+    mapping_path = Path(mapping_path)
+    return mapping_path.with_name(mapping_path.stem + ".table.bin")
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class MappingTable:
+    """
+    Compact, memory-mapped form of the mapping artifact.
+
+    Columnar rows (interned parent index, confidence, review flag, child id /
+    name offsets into one UTF-8 blob), an open-addressing child_id hash table
+    and a parent -> rows CSR index. Lookups by child_id or parent_id touch a
+    handful of array slots; nothing is decoded into Python objects up front
+    except the (small) parent list. Stored with p4_utils.packed_file.
+    """
+
+    def __init__(self, sections: Dict[str, np.ndarray], mm: Optional[mmap.mmap] = None):
+        self._s = sections
+        self._blob = sections["blob"]
+        self._mm = mm
+
+        self.parent_ids = [self._str("parent_id", i) for i in range(len(sections["parent_id"]) - 1)]
+        self.parent_names = [self._str("parent_name", i) for i in range(len(sections["parent_name"]) - 1)]
+        self._parent_pos = {pid: i for i, pid in enumerate(self.parent_ids)}
+        self._mask = len(sections["slots"]) - 1
+
+    # -------------------------------------------------
+    # Writing
+    # -------------------------------------------------
+    @staticmethod
+    def save(mappings: List[Dict], path: str | Path) -> None:
+        parent_pos: Dict[str, int] = {}
+        parent_names: List[str] = []
+        for m in mappings:
+            if m["resolved_parent_id"] not in parent_pos:
+                parent_pos[m["resolved_parent_id"]] = len(parent_names)
+                parent_names.append(m["resolved_parent_name"])
+
+        parent_idx = np.array([parent_pos[m["resolved_parent_id"]] for m in mappings], dtype=np.int32)
+        child_ids = [m["child_id"] for m in mappings]
+        child_hash = np.array([_hash(c) for c in child_ids], dtype=np.uint64)
+
+        n_slots = 1
+        while n_slots < 2 * max(len(mappings), 1):
+            n_slots *= 2
+        slots = np.full(n_slots, -1, dtype=np.int32)
+        for row, h in enumerate(child_hash.tolist()):
+            s = h & (n_slots - 1)
+            while slots[s] >= 0:
+                if child_ids[slots[s]] == child_ids[row]:
+                    raise ValueError(f"Duplicate child_id in mapping: {child_ids[row]}")
+                s = (s + 1) & (n_slots - 1)
+            slots[s] = row
+
+        order = np.argsort(parent_idx, kind="stable")
+        parent_start = np.zeros(len(parent_names) + 1, dtype=np.uint32)
+        np.cumsum(np.bincount(parent_idx, minlength=len(parent_names)), out=parent_start[1:])
+
+        blob = bytearray()
+        sections: Dict[str, np.ndarray] = {}
+        for name, values in (
+            ("child_id", child_ids),
+            ("child_name", [m["child_name"] for m in mappings]),
+            ("parent_id", list(parent_pos)),
+            ("parent_name", parent_names),
+        ):
+            offsets, data = pack_strings(values)
+            sections[name] = offsets + len(blob)
+            blob += data
+
+        sections.update(
+            parent_idx=parent_idx,
+            confidence=np.array([m["confidence_score"] for m in mappings], dtype=np.float64),
+            review=np.array([bool(m["review_needed"]) for m in mappings], dtype=np.uint8),
+            child_hash=child_hash,
+            slots=slots,
+            parent_start=parent_start,
+            parent_rows=order.astype(np.uint32),
+            blob=np.frombuffer(bytes(blob), dtype=np.uint8),
+        )
+        write_packed(path, TABLE_MAGIC, sections, {"version": TABLE_VERSION, "rows": len(mappings)})
+
+    # -------------------------------------------------
+    # Reading
+    # -------------------------------------------------
+    @classmethod
+    def open(cls, path: str | Path) -> Optional["MappingTable"]:
+        if not Path(path).exists():
+            return None
+        meta, sections, mm = read_packed(path, TABLE_MAGIC)
+        if meta.get("version") != TABLE_VERSION:
+            close_packed(sections, mm)
+            return None
+        return cls(sections, mm)
+
+    def close(self) -> None:
+        self._blob = None
+        close_packed(self._s, self._mm)
+        self._mm = None
+
+    def __enter__(self) -> "MappingTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -------------------------------------------------
+    # Lookups
+    # -------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._s["parent_idx"])
+
+    def _str(self, column: str, i: int) -> str:
+        return packed_string(self._s[column], self._blob, i)
+
+    def row_of(self, child_id: str) -> Optional[int]:
+        slots = self._s["slots"]
+        hashes = self._s["child_hash"]
+        h = _hash(child_id)
+        s = h & self._mask
+        while True:
+            row = int(slots[s])
+            if row < 0:
+                return None
+            if int(hashes[row]) == h and self._str("child_id", row) == child_id:
+                return row
+            s = (s + 1) & self._mask
+
+    def __contains__(self, child_id: str) -> bool:
+        return self.row_of(child_id) is not None
+
+    def row(self, i: int) -> Dict:
+        """
+        Row i in the config_archetypes_mapped.json layout.
+        """
+        p = int(self._s["parent_idx"][i])
+        return {
+            "child_id": self._str("child_id", i),
+            "child_name": self._str("child_name", i),
+            "resolved_parent_id": self.parent_ids[p],
+            "resolved_parent_name": self.parent_names[p],
+            "confidence_score": float(self._s["confidence"][i]),
+            "review_needed": bool(self._s["review"][i]),
+        }
+
+    def get(self, child_id: str) -> Optional[Dict]:
+        row = self.row_of(child_id)
+        return None if row is None else self.row(row)
+
+    def parent_of(self, child_id: str) -> Optional[str]:
+        row = self.row_of(child_id)
+        return None if row is None else self.parent_ids[int(self._s["parent_idx"][row])]
+
+    def rows_of(self, parent_id: str) -> np.ndarray:
+        """
+        Row indices mapped to this parent, in artifact order.
+        """
+        p = self._parent_pos.get(parent_id)
+        if p is None:
+            return np.zeros(0, dtype=np.uint32)
+        start = self._s["parent_start"]
+        return self._s["parent_rows"][start[p]:start[p + 1]]
+
+    def children_of(self, parent_id: str) -> List[str]:
+        return [self._str("child_id", int(i)) for i in self.rows_of(parent_id)]
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def to_rows(self) -> List[Dict]:
+        return list(self)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from p4_core.archetype import ArchetypeParent
+from p4_core.trope import TropeChild
+
+
+def parent_text(p: ArchetypeParent) -> str:
+    return f"{p.name}. {p.primary_goal or ''} {p.primary_fear or ''}"
+
+
+def child_text(child: TropeChild) -> str:
+    return " ".join(
+        t for t in [
+            child.parent_archetype_raw,
+            child.name,
+            child.description,
+        ]
+        if t
+    )
+
+
+def child_fields(child: TropeChild, fields: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    (field, text) pairs for the child's non-empty fields, in `fields` order.
+    """
+    out = []
+    for field in fields:
+        text = getattr(child, field)
+        if text:
+            out.append((field, text))
+    return out
+
+
+def text_mode(field_weights: Optional[Dict[str, float]]) -> str:
+    """
+    Short label of how child texts are embedded; part of the mapping
+    fingerprint so switching modes forces a remap.
+    """
+    if not field_weights:
+        return "joined"
+    return "weighted:" + ",".join(f"{k}={v:g}" for k, v in field_weights.items())
+
+
+def child_signature(child: TropeChild, field_weights: Optional[Dict[str, float]]) -> str:
+    """
+    Exact text input for a child under the given mode (used for hashing).
+    """
+    if not field_weights:
+        return child_text(child)
+    return "\x1f".join(f"{f}\x1e{t}" for f, t in child_fields(child, field_weights))
@@ -1,6 +1,9 @@
-from typing import Dict
+from typing import Dict, Tuple
 
 
+# Trait order of every OCEAN vector / array
+OCEAN_TRAITS: Tuple[str, ...] = ("openness", "conscientiousness", "extroversion", "agreeableness", "neuroticism")
+
 # OCEAN deltas applied on top of archetype bias
 BIOME_OCEAN_MODIFIERS: Dict[int, Dict[str, float]] = {
     # Urban
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from typing import Collection, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from p4_rules.archetype_pools import ARCHETYPE_POOLS
+from p4_rules.biome_registry import BIOME_REGISTRY, BiomeDefinition
+from p4_rules.biome_rules import BIOME_OCEAN_MODIFIERS, OCEAN_TRAITS
+
+# Unknown land biomes are treated as frontier hinterland
+FALLBACK_BIOME = 40
+
+# Biome codes are ESA WorldCover-style bytes
+NUM_CODES = 256
+
+
+def validate_biome_rules(
+    registry: Mapping[int, BiomeDefinition] = BIOME_REGISTRY,
+    pools: Mapping[int, Sequence[str]] = ARCHETYPE_POOLS,
+    modifiers: Mapping[int, Mapping[str, float]] = BIOME_OCEAN_MODIFIERS,
+    parent_ids: Optional[Collection[str]] = None,
+    fallback: int = FALLBACK_BIOME,
+) -> List[str]:
+    """
+    Cross-checks the biome registry, archetype pools and OCEAN modifiers.
+    Returns a list of problems (empty when consistent). With `parent_ids`,
+    pool entries are also checked against the loaded parents.
+    """
+    problems: List[str] = []
+
+    if fallback not in registry:
+        problems.append(f"fallback biome {fallback} is not registered")
+
+    for code, biome in registry.items():
+        if not 0 <= code < NUM_CODES:
+            problems.append(f"BIOME_REGISTRY[{code}] is outside 0..{NUM_CODES - 1}")
+        if biome.code != code:
+            problems.append(f"BIOME_REGISTRY[{code}] has code {biome.code}")
+        if not pools.get(code):
+            problems.append(f"biome {code} has no archetype pool")
+        if code not in modifiers:
+            problems.append(f"biome {code} has no OCEAN modifiers")
+
+    for code in pools:
+        if code not in registry:
+            problems.append(f"ARCHETYPE_POOLS[{code}] is not a registered biome")
+    for code, mods in modifiers.items():
+        if code not in registry:
+            problems.append(f"BIOME_OCEAN_MODIFIERS[{code}] is not a registered biome")
+        for trait in mods:
+            if trait not in OCEAN_TRAITS:
+                problems.append(f"BIOME_OCEAN_MODIFIERS[{code}] has unknown trait {trait!r}")
+
+    if parent_ids is not None:
+        for code, pool in pools.items():
+            for pid in pool:
+                if pid not in parent_ids:
+                    problems.append(f"ARCHETYPE_POOLS[{code}] references unknown parent {pid}")
+
+    return problems
+
+
+class BiomeRuleTable:
+    """
+    Biome registry, archetype pools and OCEAN modifiers compiled into dense
+    arrays indexed by biome code (0..255), with the fallback to biome 40
+    already applied to every unregistered code:
+
+    resolved      int16   (256,)    registered code each code resolves to
+    theme_id      int16   (256,)    index into `themes`
+    pool_start    int32   (256,)    range of the archetype pool in
+    pool_size     int32   (256,)    `pool_members`
+    pool_members  int16   (M,)      indices into `parent_ids`
+    harshness     float32 (256,)
+    population    float32 (256,)    population_density
+    modifiers     float64 (256, 5)  OCEAN deltas in OCEAN_TRAITS order
+
+    A whole biome_code grid resolves with one fancy-indexing operation,
+    e.g. table.theme_id[table.index(grid)]. Missing cells (code < 0) and
+    codes outside 0..255 resolve to the fallback biome.
+    """
+
+    def __init__(
+        self,
+        biomes: Dict[int, BiomeDefinition],
+        parent_ids: Sequence[str],
+        themes: Sequence[str],
+        resolved: np.ndarray,
+        theme_id: np.ndarray,
+        pool_start: np.ndarray,
+        pool_size: np.ndarray,
+        pool_members: np.ndarray,
+        harshness: np.ndarray,
+        population: np.ndarray,
+        modifiers: np.ndarray,
+        fallback: int,
+    ):
+        self.biomes = biomes
+        self.parent_ids = tuple(parent_ids)
+        self.themes = tuple(themes)
+        self.resolved = resolved
+        self.theme_id = theme_id
+        self.pool_start = pool_start
+        self.pool_size = pool_size
+        self.pool_members = pool_members
+        self.harshness = harshness
+        self.population = population
+        self.modifiers = modifiers
+        self.fallback = fallback
+
+    @classmethod
+    def build(
+        cls,
+        parent_ids: Optional[Collection[str]] = None,
+        registry: Mapping[int, BiomeDefinition] = BIOME_REGISTRY,
+        pools: Mapping[int, Sequence[str]] = ARCHETYPE_POOLS,
+        modifiers: Mapping[int, Mapping[str, float]] = BIOME_OCEAN_MODIFIERS,
+        fallback: int = FALLBACK_BIOME,
+    ) -> "BiomeRuleTable":
+        """
+        Raises ValueError listing every inconsistency between the registries.
+        Pool entries not in `parent_ids` are dropped (as the generators do);
+        a pool left empty is an error.
+        """
+        problems = validate_biome_rules(registry, pools, modifiers, fallback=fallback)
+        pool_parents: Dict[int, List[str]] = {
+            code: [pid for pid in pools.get(code, []) if parent_ids is None or pid in parent_ids]
+            for code in registry
+        }
+        if parent_ids is not None:
+            for code, pool in pool_parents.items():
+                if pools.get(code) and not pool:
+                    problems.append(f"biome {code} has no valid archetypes")
+        if problems:
+            raise ValueError("Inconsistent biome rules:\n  " + "\n  ".join(problems))
+
+        parents: List[str] = []
+        themes: List[str] = []
+        members: List[int] = []
+        spans: Dict[int, Tuple[int, int]] = {}
+        for code in sorted(registry):
+            if registry[code].theme not in themes:
+                themes.append(registry[code].theme)
+            start = len(members)
+            for pid in pool_parents[code]:
+                if pid not in parents:
+                    parents.append(pid)
+                members.append(parents.index(pid))
+            spans[code] = (start, len(members) - start)
+
+        resolved = np.full(NUM_CODES, fallback, dtype=np.int16)
+        resolved[sorted(registry)] = sorted(registry)
+
+        theme_id = np.zeros(NUM_CODES, dtype=np.int16)
+        pool_start = np.zeros(NUM_CODES, dtype=np.int32)
+        pool_size = np.zeros(NUM_CODES, dtype=np.int32)
+        harshness = np.zeros(NUM_CODES, dtype=np.float32)
+        population = np.zeros(NUM_CODES, dtype=np.float32)
+        mods = np.zeros((NUM_CODES, len(OCEAN_TRAITS)), dtype=np.float64)
+        for code in range(NUM_CODES):
+            biome = registry[int(resolved[code])]
+            theme_id[code] = themes.index(biome.theme)
+            pool_start[code], pool_size[code] = spans[biome.code]
+            harshness[code] = biome.harshness
+            population[code] = biome.population_density
+            biome_mods = modifiers.get(biome.code, {})
+            mods[code] = [biome_mods.get(trait, 0.0) for trait in OCEAN_TRAITS]
+
+        return cls(
+            biomes=dict(registry),
+            parent_ids=parents,
+            themes=themes,
+            resolved=resolved,
+            theme_id=theme_id,
+            pool_start=pool_start,
+            pool_size=pool_size,
+            pool_members=np.array(members, dtype=np.int16),
+            harshness=harshness,
+            population=population,
+            modifiers=mods,
+            fallback=fallback,
+        )
+
+    # -------------------------------------------------
+    # Scalar lookups
+    # -------------------------------------------------
+    def biome(self, code: Optional[int]) -> BiomeDefinition:
+        """
+        get_biome() with the fallback applied (None = missing cell).
+        """
+        if code is None or not 0 <= code < NUM_CODES:
+            return self.biomes[self.fallback]
+        return self.biomes[int(self.resolved[code])]
+
+    def pool(self, code: Optional[int]) -> List[str]:
+        """
+        Archetype parent ids allowed in the biome `code` resolves to.
+        """
+        code = self.biome(code).code
+        start = int(self.pool_start[code])
+        return [self.parent_ids[i] for i in self.pool_members[start:start + self.pool_size[code]]]
+
+    # -------------------------------------------------
+    # Vectorized
+    # -------------------------------------------------
+    def index(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Any array of biome codes (e.g. TerrainMap.biome_code) -> safe indices
+        into the dense arrays; out-of-range codes map to the fallback.
+        """
+        codes = np.asarray(codes)
+        return np.where((codes >= 0) & (codes < NUM_CODES), codes, self.fallback)
+
+    def resolve(self, codes: np.ndarray) -> np.ndarray:
+        return self.resolved[self.index(codes)]
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+_HEADER_LEN = struct.Struct("<I")
+_ALIGN = 8
+
+
+def pack_strings(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, bytes]:
+    """
+    UTF-8 blob plus (n + 1) u32 offsets; None is stored as an empty string.
+    """
+    encoded = [(v or "").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def write_packed(
+    path: str | Path,
+    magic: bytes,
+    sections: Dict[str, np.ndarray],
+    meta: Dict[str, Any],
+) -> None:
+    """
+    Writes named numpy arrays into one file that read_packed() can
+    memory-map: magic, u32 header length, JSON header (meta + per-section
+    offset / dtype / shape), then the 8-byte aligned sections. The file is
+    written next to `path` and renamed into place.
+    """
+    layout = {}
+    offset = 0
+    for name, arr in sections.items():
+        layout[name] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+        offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({**meta, "sections": layout}).encode("utf-8")
+
+    prefix = len(magic) + _HEADER_LEN.size + len(header)
+    header += b" " * (-prefix % _ALIGN)
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(magic)
+        f.write(_HEADER_LEN.pack(len(header)))
+        f.write(header)
+        for arr in sections.values():
+            data = np.ascontiguousarray(arr).tobytes()
+            f.write(data + b"\0" * (-len(data) % _ALIGN))
+    os.replace(tmp, path)
+
+
+def read_packed(
+    path: str | Path,
+    magic: bytes,
+) -> Tuple[Dict[str, Any], Dict[str, np.ndarray], mmap.mmap]:
+    """
+    Memory-maps a write_packed() file. Returns (meta, sections, mmap); the
+    arrays are read-only views into the mapping, so every process opening
+    the same file shares one copy through the page cache.
+    """
+    path = Path(path)
+    with path.open("rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mm[:len(magic)] != magic:
+        mm.close()
+        raise ValueError(f"Unexpected file format: {path}")
+    (header_len,) = _HEADER_LEN.unpack_from(mm, len(magic))
+    start = len(magic) + _HEADER_LEN.size
+    meta = json.loads(mm[start:start + header_len])
+
+    base = start + header_len
+    sections: Dict[str, np.ndarray] = {}
+    for name, s in meta.pop("sections").items():
+        dtype = np.dtype(s["dtype"])
+        count = int(np.prod(s["shape"], dtype=np.int64))
+        sections[name] = np.frombuffer(mm, dtype=dtype, count=count, offset=base + s["offset"]).reshape(s["shape"])
+    return meta, sections, mm
+
+
+def packed_string(offsets: np.ndarray, blob: np.ndarray, i: int) -> str:
+    return blob[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+
+def close_packed(sections: Dict[str, np.ndarray], mm: Optional[mmap.mmap]) -> None:
+    sections.clear()
+    if mm is not None:
+        try:
+            mm.close()
+        except BufferError:
+            pass  # views handed out to callers still alive; closed once collected
@@ -1,12 +1,181 @@
-from typing import Tuple, Optional
+import math
+import random
+from typing import Dict, Tuple, Optional
+
+import numpy as np
+
 from p4_loaders.terrain_loader import TerrainMap
 
 
+class BiomeSpatialIndex:
+    """
+    Per-biome cell index, built once per map.
+
+    Cells are grouped by biome (row-major inside each group) for O(1)
+    "all cells" / "random cell" queries, bucketed into square tiles for
+    nearest-cell search, and summed-area tables (built lazily per biome)
+    answer bounding-box counts in O(1).
+    """
+
+    def __init__(self, terrain_map: TerrainMap, tile_size: int = 16):
+        self.origin = terrain_map.origin
+        self.width = terrain_map.width
+        self.height = terrain_map.height
+        self.tile_size = max(1, int(tile_size))
+        self._codes = np.where(terrain_map.present, terrain_map.biome_code, -1)
+
+        codes = self._codes.ravel()
+        flat = np.flatnonzero(codes >= 0)
+        by_biome = flat[np.argsort(codes[flat], kind="stable")]
+        biomes, starts, counts = np.unique(codes[by_biome], return_index=True, return_counts=True)
+
+        self._cells: Dict[int, np.ndarray] = {
+            int(b): by_biome[s:s + n]
+            for b, s, n in zip(biomes, starts, counts)
+        }
+        self._tiles: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._sat: Dict[int, np.ndarray] = {}
+
+        self.tiles_x = -(-self.width // self.tile_size)
+        self.tiles_y = -(-self.height // self.tile_size)
+
+    @property
+    def biomes(self) -> Tuple[int, ...]:
+        return tuple(self._cells)
+
+    def count(self, biome_code: int) -> int:
+        cells = self._cells.get(biome_code)
+        return 0 if cells is None else len(cells)
+
+    def _to_xy(self, flat: int) -> Tuple[int, int]:
+        row, col = divmod(int(flat), self.width)
+        return col + self.origin[0], row + self.origin[1]
+
+    # -------------------------------------------------
+    # Membership queries
+    # -------------------------------------------------
+    def cells_of(self, biome_code: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (xs, ys) of every cell with this biome, in row-major order.
+        """
+        cells = self._cells.get(biome_code)
+        if cells is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        rows, cols = np.divmod(cells, self.width)
+        return cols + self.origin[0], rows + self.origin[1]
+
+    def first_cell(self, biome_code: int) -> Optional[Tuple[int, int]]:
+        cells = self._cells.get(biome_code)
+        if cells is None:
+            return None
+        return self._to_xy(cells[0])
+
+    def random_cell(self, biome_code: int, rng: random.Random) -> Optional[Tuple[int, int]]:
+        cells = self._cells.get(biome_code)
+        if cells is None:
+            return None
+        return self._to_xy(cells[rng.randrange(len(cells))])
+
+    # -------------------------------------------------
+    # Nearest cell (tile buckets, expanding rings)
+    # -------------------------------------------------
+    def _tile_buckets(self, biome_code: int) -> Tuple[np.ndarray, np.ndarray]:
+        buckets = self._tiles.get(biome_code)
+        if buckets is None:
+            cells = self._cells[biome_code]
+            rows, cols = np.divmod(cells, self.width)
+            tile = (rows // self.tile_size) * self.tiles_x + cols // self.tile_size
+            order = np.argsort(tile, kind="stable")
+            buckets = self._tiles[biome_code] = (tile[order], cells[order])
+        return buckets
+
+    def nearest_cell(self, biome_code: int, x: int, y: int) -> Optional[Tuple[int, int]]:
+        """
+        Closest cell of the biome to (x, y) by Euclidean distance; ties go to
+        the first cell in row-major order.
+        """
+        if biome_code not in self._cells:
+            return None
+
+        tile_ids, cells = self._tile_buckets(biome_code)
+        t = self.tile_size
+        col = x - self.origin[0]
+        row = y - self.origin[1]
+        tx = min(max(col // t, 0), self.tiles_x - 1)
+        ty = min(max(row // t, 0), self.tiles_y - 1)
+
+        best: Optional[Tuple[int, int]] = None  # (squared distance, flat)
+        max_ring = max(tx, self.tiles_x - 1 - tx, ty, self.tiles_y - 1 - ty)
+
+        for ring in range(max_ring + 1):
+            for rx in range(tx - ring, tx + ring + 1):
+                if not 0 <= rx < self.tiles_x:
+                    continue
+                for ry in range(ty - ring, ty + ring + 1):
+                    if not 0 <= ry < self.tiles_y:
+                        continue
+                    if max(abs(rx - tx), abs(ry - ty)) != ring:
+                        continue
+
+                    tile = ry * self.tiles_x + rx
+                    lo, hi = np.searchsorted(tile_ids, [tile, tile + 1])
+                    if lo == hi:
+                        continue
+
+                    bucket = cells[lo:hi]
+                    brows, bcols = np.divmod(bucket, self.width)
+                    d2 = (bcols - col) ** 2 + (brows - row) ** 2
+                    i = int(np.argmin(d2))
+                    cand = (int(d2[i]), int(bucket[i]))
+                    if best is None or cand < best:
+                        best = cand
+
+            # Unvisited tiles are more than ring * tile_size away.
+            if best is not None and math.sqrt(best[0]) <= ring * t:
+                break
+
+        return None if best is None else self._to_xy(best[1])
+
+    # -------------------------------------------------
+    # Bounding-box counts (summed-area tables)
+    # -------------------------------------------------
+    def _summed_area(self, biome_code: int) -> np.ndarray:
+        sat = self._sat.get(biome_code)
+        if sat is None:
+            sat = np.zeros((self.height + 1, self.width + 1), dtype=np.int32)
+            np.cumsum(np.cumsum(self._codes == biome_code, axis=0, dtype=np.int32), axis=1, out=sat[1:, 1:])
+            self._sat[biome_code] = sat
+        return sat
+
+    def counts_in_box(self, x_min: int, y_min: int, x_max: int, y_max: int) -> Dict[int, int]:
+        """
+        Number of cells of each biome inside the inclusive box.
+        """
+        c0 = max(x_min - self.origin[0], 0)
+        r0 = max(y_min - self.origin[1], 0)
+        c1 = min(x_max - self.origin[0], self.width - 1) + 1
+        r1 = min(y_max - self.origin[1], self.height - 1) + 1
+        if c0 >= c1 or r0 >= r1:
+            return {}
+
+        out: Dict[int, int] = {}
+        for biome_code in self._cells:
+            sat = self._summed_area(biome_code)
+            n = int(sat[r1, c1] - sat[r0, c1] - sat[r1, c0] + sat[r0, c0])
+            if n:
+                out[biome_code] = n
+        return out
+
+
 def find_cell_with_biome(
     terrain_map: TerrainMap,
     target_biome: int,
+    index: Optional[BiomeSpatialIndex] = None,
 ) -> Optional[Tuple[int, int]]:
-    for (x, y), cell in terrain_map.cells.items():
-        if cell.biome_code == target_biome:
-            return x, y
-    return None
+    if index is not None:
+        return index.first_cell(target_biome)
+
+    xs, ys = terrain_map.cell_coords(terrain_map.biome_code == target_biome)
+    if len(xs) == 0:
+        return None
+    return int(xs[0]), int(ys[0])
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from p4_config.paths import get_data_paths
+from p4_loaders.archetype_loader import ArchetypeLoader
+from p4_loaders.terrain_loader import TerrainLoader
+from p4_loaders.trope_loader import TropeLoader
+
+MAPPING_FILE = "config_archetypes_mapped.json"
+SF_MAP_FILE = "sf_context_grid.json"
+
+
+@pytest.fixture(scope="session")
+def sf_map_path():
+    path = get_data_paths().attachments_dir / SF_MAP_FILE
+    if not path.exists():
+        pytest.skip("SF terrain map not available")
+    return path
+
+
+@pytest.fixture(scope="session")
+def generation_inputs(sf_map_path):
+    """
+    (SF terrain map, parents_by_id, tropes, mapping rows) from the repo data.
+    """
+    paths = get_data_paths()
+    mapping_path = paths.project_root / MAPPING_FILE
+    if not mapping_path.exists():
+        pytest.skip("mapping artifact not available")
+
+    parents = ArchetypeLoader().load(paths.parent_archetypes_path)
+    tropes = TropeLoader().load(paths.tropes_child_path)
+    with open(mapping_path, "r", encoding="utf-8") as f:
+        mappings = json.load(f)
+    terrain = TerrainLoader().load_map(sf_map_path)
+    return terrain, {p.id: p for p in parents}, tropes, mappings
@@ -0,0 +1,51 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from p4_generator.alias_sampler import AliasTable, confidence_weight
+from p4_generator.population import PopulationEngine
+
+WEIGHTS = [5.0, 0.0, 1.0, 3.0, 0.5, 0.5]
+DRAWS = 200_000
+
+
+def _assert_matches_weights(picks):
+    counts = Counter(picks)
+    assert counts[1] == 0  # zero weight: never drawn
+    total = sum(WEIGHTS)
+    for i, w in enumerate(WEIGHTS):
+        expected = DRAWS * w / total
+        # well past 5 standard deviations of a binomial count
+        assert abs(counts[i] - expected) <= 6 * (expected + 1) ** 0.5
+
+
+def test_alias_draws_follow_weights():
+    table = AliasTable.from_weights(WEIGHTS)
+    rng = random.Random(7)
+    _assert_matches_weights(table.draw(rng) for _ in range(DRAWS))
+    _assert_matches_weights(table.draw_many(DRAWS, np.random.default_rng(7)).tolist())
+
+
+@pytest.mark.parametrize("weights", [[], [0.0, 0.0], [1.0, -1.0], [1.0, float("nan")]])
+def test_alias_rejects_bad_weights(weights):
+    with pytest.raises(ValueError):
+        AliasTable.from_weights(weights)
+
+
+def test_confidence_weighted_population(generation_inputs):
+    terrain, parents_by_id, tropes, mappings = generation_inputs
+    engine = PopulationEngine(parents_by_id, tropes, mappings, confidence_weighted=True)
+    weight = confidence_weight(mappings)
+
+    npcs = list(engine.iter_npcs(terrain, seed=3, per_cell_seed=True))
+    assert npcs == list(
+        PopulationEngine(parents_by_id, tropes, mappings, confidence_weighted=True)
+        .iter_npcs(terrain, seed=3, per_cell_seed=True)
+    )
+    for npc in npcs:
+        parent_id, theme = npc["archetype_parent"], npc["origin"]["mapped_theme"]
+        pool = engine.trope_index.candidates(parent_id, theme)
+        trope = next(t for t in pool if t.id == npc["trope_child"])
+        assert weight(parent_id, trope) > 0
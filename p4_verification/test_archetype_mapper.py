@@ -0,0 +1,30 @@
+import numpy as np
+
+from p4_core.archetype import ArchetypeParent
+from p4_core.trope import TropeChild
+from p4_embeddings.hashing_embedder import HashingEmbedder
+from p4_mappers.archetype_mapper import ArchetypeMapper
+from p4_mappers.mapping_config import CHILD_TEXT_WEIGHTS
+
+
+def _parent(pid, name):
+    return ArchetypeParent(
+        id=pid, name=name, function_category=None, ocean_bias={}, primary_goal=None, primary_fear=None,
+    )
+
+
+def _child(cid, name=None, raw=None, description=None):
+    return TropeChild(id=cid, name=name, parent_archetype_raw=raw, description=description, genre_tag=None)
+
+
+def test_weighted_mapping_with_empty_children():
+    parents = [_parent("P1", "Mentor"), _parent("P2", "Trickster")]
+    empty = _child("C_EMPTY", name="")
+    mapper = ArchetypeMapper(HashingEmbedder(dim=64), field_weights=CHILD_TEXT_WEIGHTS)
+
+    # a chunk of only empty children, then one mixed with a normal child
+    for children in ([empty], [empty, _child("C1", name="Wise Mentor", raw="Mentor")]):
+        scores = mapper.score_children(parents, children)
+        assert len(scores) == len(children)
+        assert np.all(scores.top_scores[0] == 0)
+    assert scores.parent_ids[scores.top_idx[1, 0]] == "P1"
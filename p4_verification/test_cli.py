@@ -0,0 +1,11 @@
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("extra", [["--workers", "2"], ["--per-cell-seed"]])
+def test_export_count_rejects_unsupported_flags(tmp_path, capsys, extra):
+    with pytest.raises(SystemExit) as exc:
+        main.main(["export", "any_map", "--out", str(tmp_path), "--count", "10", *extra])
+    assert exc.value.code == 2
+    assert "--count cannot be combined" in capsys.readouterr().err
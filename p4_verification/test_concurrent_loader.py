@@ -0,0 +1,78 @@
+import json
+
+import numpy as np
+
+from p4_loaders.concurrent_loader import ConcurrentLoader, _load_map_in_process
+from p4_loaders.terrain_loader import TerrainLoader
+
+
+def _write_map(path, size=4):
+    grid = [
+        {"x": x, "y": y, "geo_data": {"elevation": float(x * y), "biome_code": 10}}
+        for y in range(size) for x in range(size)
+    ]
+    path.write_text(json.dumps({"meta": {}, "grid": grid}))
+
+
+def _assert_same(a, b):
+    assert a.name == b.name
+    assert np.array_equal(a.present, b.present)
+    for name in a.columns:
+        assert np.array_equal(a.columns[name], b.columns[name], equal_nan=True)
+
+
+def test_process_load_with_cache(tmp_path):
+    maps = tmp_path / "maps"
+    maps.mkdir()
+    _write_map(maps / "a.json")
+    _write_map(maps / "b.json", size=5)
+
+    loader = ConcurrentLoader(cache_dir=tmp_path / "cache", process_threshold=0, max_processes=2)
+    loaded = loader.load_folder(maps)
+    expected = TerrainLoader().load_folder(maps)
+    assert len(loaded) == 2
+    for a, b in zip(loaded, expected):
+        _assert_same(a, b)
+
+
+def test_process_load_when_cache_write_fails(tmp_path):
+    maps = tmp_path / "maps"
+    maps.mkdir()
+    _write_map(maps / "a.json")
+    _write_map(maps / "b.json", size=5)
+    # a file where the cache directory should be: every cache write fails
+    blocked = tmp_path / "cache"
+    blocked.write_text("")
+
+    loader = ConcurrentLoader(cache_dir=blocked, process_threshold=0, max_processes=2)
+    # the worker hands back the decoded map instead of pointing at the cache
+    terrain_map, _ = _load_map_in_process(str(maps / "a.json"), loader.loader_kwargs)
+    assert terrain_map is not None
+
+    reports = []
+    paths = sorted(maps.glob("*.json"))
+    with loader._executors(paths) as (_, submit_map):
+        loaded = loader._collect_maps([submit_map(p) for p in paths], reports)
+
+    assert [r.executor for r in reports] == ["process", "process"]
+    assert all(r.ok for r in reports)
+    for a, b in zip(loaded, TerrainLoader().load_folder(maps)):
+        _assert_same(a, b)
+
+
+def test_cached_maps_skip_the_process_pool(tmp_path):
+    maps = tmp_path / "maps"
+    maps.mkdir()
+    _write_map(maps / "a.json")
+    paths = [maps / "a.json"]
+
+    loader = ConcurrentLoader(cache_dir=tmp_path / "cache", process_threshold=0, max_processes=2)
+    executors = []
+    for _ in range(2):
+        reports = []
+        with loader._executors(paths) as (_, submit_map):
+            loader._collect_maps([submit_map(p) for p in paths], reports)
+        executors.append(reports[0].executor)
+
+    # cold cache: parsed in a process; warm cache: memory-mapped on a thread
+    assert executors == ["process", "thread"]
@@ -0,0 +1,37 @@
+import numpy as np
+
+from p4_embeddings.embedding_cache import CachedEmbedder
+from p4_embeddings.hashing_embedder import HashingEmbedder
+
+
+class _Counting(HashingEmbedder):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+def test_cache_hits_misses_and_vectors_across_instances(tmp_path):
+    texts = ["iron-willed smuggler", "tundra hermit", "neon hacker"]
+    model = _Counting(dim=64)
+
+    first = CachedEmbedder(model, tmp_path)
+    vectors = first.embed(texts)
+    assert (first.hits, first.misses) == (0, 3)
+    np.testing.assert_array_equal(vectors, HashingEmbedder(dim=64).embed(texts))
+
+    # a new instance reads what the first one committed
+    model.embedded.clear()
+    second = CachedEmbedder(model, tmp_path)
+    again = second.embed(texts[::-1] + ["frontier veteran"])
+    assert (second.hits, second.misses) == (3, 1)
+    assert model.embedded == ["frontier veteran"]
+    np.testing.assert_array_equal(again[:3], vectors[::-1])
+
+    # another model setting gets its own namespace
+    other = CachedEmbedder(_Counting(dim=64, normalize=False), tmp_path)
+    other.embed(texts)
+    assert (other.hits, other.misses) == (0, 3)
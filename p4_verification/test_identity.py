@@ -0,0 +1,35 @@
+from p4_generator.identity import MAP_TAG_LENGTH, NameRegistry, disambiguate, map_tag, npc_id, parse_npc_id
+
+
+def _npc(x, y, name="Kari Ashwood"):
+    return {"npc_id": npc_id("map", x, y), "name": name}
+
+
+def test_npc_id_round_trip():
+    value = npc_id("Tokyo_MegaCity", 70, 4, 2)
+    assert parse_npc_id(value) == (map_tag("Tokyo_MegaCity"), 70, 4, 2)
+    assert len(map_tag("Tokyo_MegaCity")) == MAP_TAG_LENGTH
+
+
+def test_renamed_npc_name_does_not_depend_on_order():
+    a, b, c = _npc(0, 0), _npc(1, 0), _npc(2, 0)
+
+    forward = {n["npc_id"]: n["name"] for n in NameRegistry(capacity=100).dedupe([dict(a), dict(b), dict(c)])}
+    backward = {n["npc_id"]: n["name"] for n in NameRegistry(capacity=100).dedupe([dict(c), dict(b), dict(a)])}
+
+    assert len(set(forward.values())) == 3 and len(set(backward.values())) == 3
+    # b is renamed in both runs, to the same name
+    assert forward[b["npc_id"]] == backward[b["npc_id"]] != "Kari Ashwood"
+    assert forward[a["npc_id"]] == "Kari Ashwood" == backward[c["npc_id"]]
+
+
+def test_every_filter_hit_gets_the_id_suffix():
+    # capacity 1: the filter saturates, so fresh names also hit as false positives
+    npcs = [_npc(x, 0, name=f"Name {x % 3}") for x in range(40)]
+
+    for order in (npcs, npcs[::-1]):
+        registry = NameRegistry(capacity=1)
+        renamed = {n["npc_id"]: n["name"] for n in registry.dedupe([dict(n) for n in order])}
+        for n in npcs:
+            assert renamed[n["npc_id"]] in (n["name"], disambiguate(n["name"], n["npc_id"]))
+        assert len(set(renamed.values())) == len(npcs)
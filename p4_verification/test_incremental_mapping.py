@@ -0,0 +1,67 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from p4_config.paths import get_data_paths
+from p4_embeddings.hashing_embedder import HashingEmbedder
+from p4_loaders.archetype_loader import ArchetypeLoader
+from p4_loaders.trope_loader import TropeLoader
+from p4_mappers.archetype_mapper import ArchetypeMapper
+from p4_mappers.mapping_config import CHILD_TEXT_WEIGHTS
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    paths = get_data_paths()
+    if not paths.parent_archetypes_path.exists() or not paths.tropes_child_path.exists():
+        pytest.skip("archetype / trope catalogs not available")
+    parents = ArchetypeLoader().load(paths.parent_archetypes_path)[:12]
+    tropes = TropeLoader().load(paths.tropes_child_path)[:80]
+    return parents, tropes
+
+
+def _remap(mapper, parents, children, state, threshold=0.5):
+    rows, fingerprint, scores, _ = mapper.remap_incremental(
+        parents, children, state[0], state[1], state[2], threshold=threshold,
+    )
+    full = mapper.score_children(parents, children)
+    assert rows == full.to_rows(threshold)
+    assert scores.parent_ids == full.parent_ids and scores.child_ids == full.child_ids
+    assert np.array_equal(scores.top_idx, full.top_idx)
+    assert np.allclose(scores.top_scores, full.top_scores, atol=1e-6)
+    assert fingerprint == mapper.fingerprint(parents, children)
+    return rows, fingerprint, scores
+
+
+@pytest.mark.parametrize("field_weights", [None, CHILD_TEXT_WEIGHTS])
+def test_incremental_remap_matches_full_remap(catalog, field_weights):
+    parents, tropes = catalog
+    mapper = ArchetypeMapper(HashingEmbedder(dim=512), field_weights=field_weights)
+
+    scores = mapper.score_children(parents, tropes)
+    state = (scores.to_rows(0.5), mapper.fingerprint(parents, tropes), scores)
+
+    # trope edits
+    tropes = list(tropes)
+    tropes[3] = replace(tropes[3], description="A weary smuggler who trusts nobody on the docks.")
+    tropes[40] = replace(tropes[40], name="Reluctant Heir")
+    state = _remap(mapper, parents, tropes, state)
+
+    # parent edit
+    parents = list(parents)
+    parents[1] = replace(parents[1], primary_goal="Protect the weak at any cost.")
+    state = _remap(mapper, parents, tropes, state)
+
+    # a new parent and a new trope
+    parents.append(replace(parents[0], id="ARCH_TEST_NEW", name="Wandering Healer"))
+    tropes.append(replace(tropes[0], id="TR_TEST_NEW", name="Field Medic"))
+    state = _remap(mapper, parents, tropes, state)
+
+    # parent and trope removals
+    del parents[2]
+    del tropes[10]
+    state = _remap(mapper, parents, tropes, state)
+
+    # threshold change alone updates review flags
+    _remap(mapper, parents, tropes, state, threshold=0.9)
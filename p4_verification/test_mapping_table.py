@@ -0,0 +1,46 @@
+import pytest
+
+from p4_mappers.mapping_table import MappingTable, table_path
+
+ROWS = [
+    {"child_id": f"TC_{i:03d}", "child_name": f"Trope {i} é", "resolved_parent_id": f"AP_{i % 3}",
+     "resolved_parent_name": f"Parent {i % 3}", "confidence_score": 0.3 + i / 100, "review_needed": i % 4 == 0}
+    for i in range(40)
+]
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = table_path(tmp_path / "config_archetypes_mapped.json")
+    MappingTable.save(ROWS, path)
+    with MappingTable.open(path) as table:
+        yield table
+
+
+def test_lookup_by_child(table):
+    assert len(table) == len(ROWS)
+    assert table.to_rows() == ROWS
+    for i, row in enumerate(ROWS):
+        assert table.row_of(row["child_id"]) == i
+        assert table.get(row["child_id"]) == row
+        assert table.parent_of(row["child_id"]) == row["resolved_parent_id"]
+
+
+def test_children_of_parent(table):
+    for parent_id in ("AP_0", "AP_1", "AP_2"):
+        expected = [r["child_id"] for r in ROWS if r["resolved_parent_id"] == parent_id]
+        assert table.children_of(parent_id) == expected
+        assert [ROWS[i]["child_id"] for i in table.rows_of(parent_id).tolist()] == expected
+
+
+def test_missing_keys(table, tmp_path):
+    assert "TC_999" not in table
+    assert table.row_of("TC_999") is None and table.get("TC_999") is None
+    assert table.parent_of("TC_999") is None
+    assert table.children_of("AP_9") == [] and len(table.rows_of("AP_9")) == 0
+    assert MappingTable.open(tmp_path / "missing.table.bin") is None
+
+
+def test_duplicate_child_ids_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Duplicate child_id"):
+        MappingTable.save(ROWS + ROWS[:1], tmp_path / "dup.table.bin")
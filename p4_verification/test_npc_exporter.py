@@ -0,0 +1,75 @@
+"""
+NpcExporter regression checks: an aborted export must not leak into the
+next export written to the same directory.
+"""
+import pytest
+
+from p4_exporters.npc_exporter import NpcArchive, NpcExporter
+
+MAP_NAME = "Exporter_Test"
+
+
+def _npc(x: int, y: int, i: int = 0) -> dict:
+    return {
+        "npc_id": f"NPC_TEST_{x}_{y}_{i}",
+        "name": f"npc {x},{y},{i}",
+        "origin": {"coordinates": {"x": x, "y": y}},
+    }
+
+
+class _Abort(Exception):
+    pass
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_reexport_after_aborted_export(tmp_path, compress):
+    # chunk_records=2 so the aborted export leaves sorted-run files behind
+    with pytest.raises(_Abort):
+        with NpcExporter(tmp_path, MAP_NAME, compress=compress, chunk_records=2, block_records=2) as exporter:
+            for x in range(5):
+                exporter.write(_npc(x, 1))
+            raise _Abort()
+
+    npcs = [_npc(x, 0) for x in range(5)]
+    with NpcExporter(tmp_path, MAP_NAME, compress=compress, chunk_records=2, block_records=2) as exporter:
+        exporter.write_many(npcs)
+
+    archive = NpcArchive.open(tmp_path, MAP_NAME)
+    assert len(archive) == len(npcs)
+    assert len(archive._index["cells"][0]) == len(npcs)
+    for npc in npcs:
+        coords = npc["origin"]["coordinates"]
+        assert archive.get(coords["x"], coords["y"]) == [npc]
+        assert archive.get_by_id(npc["npc_id"]) == npc
+    assert archive.get(0, 1) == []
+    assert list(archive) == npcs
+
+
+def test_aborted_export_leaves_no_indexes(tmp_path):
+    with pytest.raises(_Abort):
+        with NpcExporter(tmp_path, MAP_NAME, chunk_records=2) as exporter:
+            for x in range(5):
+                exporter.write(_npc(x, 0))
+            raise _Abort()
+
+    out = tmp_path / MAP_NAME
+    assert not list(out.glob("*.run.*"))
+    assert not list(out.glob("*.key")) and not list(out.glob("*.loc"))
+    assert not (out / "manifest.json").exists()
+
+
+@pytest.mark.parametrize("map_name", ["../escape", "a/b", "C:\\maps\\x", "/abs/path"])
+def test_map_name_stays_inside_output_dir(tmp_path, map_name):
+    out = tmp_path / "out"
+    with NpcExporter(out, map_name) as exporter:
+        exporter.write(_npc(0, 0))
+
+    assert exporter.dir.parent == out
+    assert NpcArchive.open(out, map_name).map_name == map_name
+    assert [p.name for p in tmp_path.iterdir()] == ["out"]
+
+
+@pytest.mark.parametrize("map_name", ["", "..", "/"])
+def test_unusable_map_name_is_rejected(tmp_path, map_name):
+    with pytest.raises(ValueError, match="directory name"):
+        NpcExporter(tmp_path, map_name)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from p4_generator.ocean_calculator import OCEAN_TRAITS, apply_biome_modifiers
+from p4_generator.ocean_table import OceanTable
+from p4_rules.biome_rules import BIOME_OCEAN_MODIFIERS
+
+
+@pytest.fixture(scope="module")
+def parents_by_id(generation_inputs):
+    return generation_inputs[1]
+
+
+def test_lookup_and_gather_match_scalar_path(parents_by_id):
+    table = OceanTable.build(parents_by_id)
+    rows, cols, expected = [], [], []
+    for i, pid in enumerate(table.parent_ids):
+        for j, code in enumerate(table.biome_codes):
+            final, text = apply_biome_modifiers(parents_by_id[pid].ocean_bias, BIOME_OCEAN_MODIFIERS.get(code, {}))
+            assert table.lookup(pid, code) == (final, text, max(final, key=final.get))
+            rows.append(i)
+            cols.append(j)
+            expected.append(final)
+
+    stats, dominant = table.gather(np.array(rows), np.array(cols))
+    assert stats.tolist() == [[f[t] for t in OCEAN_TRAITS] for f in expected]
+    assert [OCEAN_TRAITS[d] for d in dominant] == [max(f, key=f.get) for f in expected]
+
+    with pytest.raises(KeyError):
+        table.lookup("NO_SUCH_PARENT", table.biome_codes[0])
+
+
+def test_vectorized_apply_matches_scalar_path(parents_by_id):
+    table = OceanTable.build(parents_by_id)
+    P, B = len(table.parent_ids), len(table.biome_codes)
+    rows = np.repeat(np.arange(P), B)
+    cols = np.tile(np.arange(B), P)
+    np.testing.assert_array_equal(table.apply(table.base[rows], cols), table.stats[rows, cols])
+
+    # jittered baselines, including values pushed past the [0, 1] clamp;
+    # random values never land on the .0005 ties where np.round and round() differ
+    rng = np.random.default_rng(3)
+    rows, cols = np.tile(rows, 20), np.tile(cols, 20)
+    base = table.base[rows] + rng.normal(0, 0.3, size=(len(rows), 5))
+    out = table.apply(base, cols).tolist()
+    for k in range(len(rows)):
+        biome_mods = BIOME_OCEAN_MODIFIERS.get(table.biome_codes[cols[k]], {})
+        final, _ = apply_biome_modifiers(dict(zip(OCEAN_TRAITS, base[k].tolist())), biome_mods)
+        assert out[k] == [final[t] for t in OCEAN_TRAITS]
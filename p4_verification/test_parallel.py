@@ -0,0 +1,53 @@
+import copy
+
+import pytest
+
+from p4_generator.identity import NameRegistry
+from p4_generator.parallel import generate_parallel
+from p4_generator.placement import plan_population
+from p4_generator.population import PopulationEngine
+
+MODES = {
+    "legacy": {},
+    "per_cell_seed": {"per_cell_seed": True},
+    "placed": {"count": 3000},
+}
+
+
+def _serial(terrain, parents_by_id, tropes, mappings, seed, per_cell_seed=False, count=None):
+    engine = PopulationEngine(parents_by_id, tropes, mappings)
+    if count is not None:
+        return list(engine.iter_placed(terrain, plan_population(terrain, count, seed=seed), seed=seed))
+    return list(engine.iter_npcs(terrain, seed=seed, per_cell_seed=per_cell_seed))
+
+
+@pytest.mark.parametrize("mode", sorted(MODES))
+def test_parallel_matches_serial(generation_inputs, sf_map_path, mode):
+    terrain, parents_by_id, tropes, mappings = generation_inputs
+    expected = _serial(terrain, parents_by_id, tropes, mappings, seed=5, **MODES[mode])
+
+    for encoded in (False, True):
+        shards = generate_parallel(
+            [sf_map_path], parents_by_id, tropes, mappings,
+            seed=5, workers=2, shard_rows=7, encoded=encoded, **MODES[mode],
+        )
+        npcs = [npc for _, shard in shards for npc in (shard.decode() if encoded else shard)]
+        assert npcs == expected
+
+
+def test_encoded_dedupe_matches_dict_dedupe(generation_inputs, sf_map_path):
+    terrain, parents_by_id, tropes, mappings = generation_inputs
+    # the same map twice: every name of the second copy clashes
+    npcs = _serial(terrain, parents_by_id, tropes, mappings, seed=5)
+    expected = list(NameRegistry(capacity=10_000).dedupe(npcs + copy.deepcopy(npcs)))
+
+    registry = NameRegistry(capacity=10_000)
+    npcs = []
+    for _, shard in generate_parallel(
+        [sf_map_path, sf_map_path], parents_by_id, tropes, mappings,
+        seed=5, workers=2, shard_rows=16, encoded=True,
+    ):
+        shard.dedupe(registry)
+        assert shard.names == [npc["name"] for npc in shard.decode()]
+        npcs.extend(shard.decode())
+    assert npcs == expected
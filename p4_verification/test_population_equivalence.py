@@ -0,0 +1,35 @@
+import pytest
+
+from p4_generator.npc_generator import generate_npc
+from p4_generator.population import generate_population
+
+
+@pytest.mark.parametrize("per_cell_seed", [False, True])
+def test_population_matches_generate_npc(generation_inputs, per_cell_seed):
+    terrain, parents_by_id, tropes, mappings = generation_inputs
+
+    population = generate_population(
+        terrain, parents_by_id, tropes, mappings, seed=9, per_cell_seed=per_cell_seed,
+    )
+
+    xs, ys = terrain.cell_coords()
+    expected = [
+        generate_npc(x, y, terrain, parents_by_id, tropes, mappings, seed=9, per_cell_seed=per_cell_seed)
+        for x, y in zip(xs.tolist(), ys.tolist())
+    ]
+    assert population == expected
+
+
+def test_population_matches_generate_npc_for_selected_cells(generation_inputs):
+    terrain, parents_by_id, tropes, mappings = generation_inputs
+    cells = [(3, 4), (1, 1), (60, 2)]
+
+    for per_cell_seed in (False, True):
+        population = generate_population(
+            terrain, parents_by_id, tropes, mappings, cells=cells, seed=9, per_cell_seed=per_cell_seed,
+        )
+        expected = [
+            generate_npc(x, y, terrain, parents_by_id, tropes, mappings, seed=9, per_cell_seed=per_cell_seed)
+            for x, y in cells
+        ]
+        assert population == expected
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from p4_rules.archetype_pools import ARCHETYPE_POOLS
+from p4_rules.biome_registry import BIOME_REGISTRY, get_biome
+from p4_rules.biome_rules import BIOME_OCEAN_MODIFIERS, OCEAN_TRAITS
+from p4_rules.rule_table import FALLBACK_BIOME, NUM_CODES, BiomeRuleTable
+
+CODES = [None, -7, -1, *range(NUM_CODES), 256, 999]
+
+
+def _expected(code):
+    # the dict lookups generate_npc() does, fallback included
+    biome = get_biome(code) or get_biome(FALLBACK_BIOME)
+    return biome, ARCHETYPE_POOLS[biome.code], BIOME_OCEAN_MODIFIERS.get(biome.code, {})
+
+
+def test_lookups_match_dict_rules():
+    table = BiomeRuleTable.build()
+    for code in CODES:
+        biome, pool, mods = _expected(code)
+        assert table.biome(code) == biome
+        assert table.pool(code) == pool
+        if code is None:
+            continue
+
+        i = int(table.index(np.array([code]))[0])
+        assert table.resolve(np.array([code])).tolist() == [biome.code]
+        assert table.themes[table.theme_id[i]] == biome.theme
+        assert table.harshness[i] == np.float32(biome.harshness)
+        assert table.population[i] == np.float32(biome.population_density)
+        assert table.modifiers[i].tolist() == [mods.get(t, 0.0) for t in OCEAN_TRAITS]
+
+
+def test_resolve_grid_matches_per_code_lookup():
+    table = BiomeRuleTable.build()
+    grid = np.array([[10, 20, -1], [999, 40, 7]])
+    assert table.resolve(grid).tolist() == [[_expected(int(c))[0].code for c in row] for row in grid]
+    assert set(table.resolve(np.arange(NUM_CODES)).tolist()) == set(BIOME_REGISTRY)
+
+
+def test_pool_entries_are_filtered_by_loaded_parents():
+    some = {pid for pool in ARCHETYPE_POOLS.values() for pid in pool[:1]}
+    table = BiomeRuleTable.build(parent_ids=some)
+    for code in BIOME_REGISTRY:
+        assert table.pool(code) == [pid for pid in ARCHETYPE_POOLS[code] if pid in some]
+
+    with pytest.raises(ValueError, match="no valid archetypes"):
+        BiomeRuleTable.build(parent_ids={"NO_SUCH_PARENT"})
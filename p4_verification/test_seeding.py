@@ -0,0 +1,33 @@
+import random
+
+from p4_generator.population import PopulationEngine
+from p4_generator.seeding import npc_seed
+
+
+def test_npc_seed_is_pinned_and_keyed_on_every_field():
+    # the per_cell_seed output of existing exports depends on this value
+    assert npc_seed(1337, "San_Francisco_Bay_Test", 3, 4, 0) == 1641952200161150577
+    keys = [(1337, "m", 3, 4, 0), (1338, "m", 3, 4, 0), (1337, "n", 3, 4, 0),
+            (1337, "m", 4, 3, 0), (1337, "m", 3, 4, 1), (1337, "m", 34, 0, 0)]
+    assert len({npc_seed(*k) for k in keys}) == len(keys)
+
+
+def test_per_cell_seeds_do_not_depend_on_sharding(generation_inputs):
+    terrain, parents_by_id, tropes, mappings = generation_inputs
+    engine = PopulationEngine(parents_by_id, tropes, mappings)
+    full = list(engine.iter_npcs(terrain, seed=11, per_cell_seed=True))
+
+    for shard_rows in (1, 5, 64):
+        bands = [(s, s + shard_rows) for s in range(0, terrain.height, shard_rows)]
+        random.Random(shard_rows).shuffle(bands)
+        sharded = [
+            npc
+            for start, stop in bands
+            for npc in engine.iter_npcs(terrain, seed=11, per_cell_seed=True, rows=(start, stop))
+        ]
+        assert sorted(sharded, key=lambda n: n["npc_id"]) == sorted(full, key=lambda n: n["npc_id"])
+
+    # any single NPC regenerates on its own
+    for npc in random.Random(0).sample(full, 20):
+        x, y = npc["origin"]["coordinates"]["x"], npc["origin"]["coordinates"]["y"]
+        assert engine.generate(terrain, x, y, seed=11, per_cell_seed=True) == npc
@@ -0,0 +1,32 @@
+import random
+
+from p4_generator.population import PopulationEngine
+from p4_generator.shared_store import SharedStore
+from p4_generator.trope_selector import TropeIndex
+from p4_rules.biome_registry import BIOME_REGISTRY
+
+
+def test_store_matches_in_memory_catalog(tmp_path, generation_inputs, sf_map_path):
+    terrain, parents_by_id, tropes, mappings = generation_inputs
+    SharedStore.build(tmp_path, list(parents_by_id.values()), tropes, mappings, [sf_map_path])
+    store = SharedStore.open(tmp_path)
+    try:
+        assert store.parents_by_id == parents_by_id
+        assert list(store.tropes) == tropes
+        assert store.mapping.to_rows() == mappings
+
+        index = TropeIndex.build(tropes, mappings)
+        themes = {b.theme for b in BIOME_REGISTRY.values()} | {"No Such Theme"}
+        for parent_id in index.by_parent:
+            for theme in themes:
+                assert list(store.trope_index.candidates(parent_id, theme)) == index.candidates(parent_id, theme)
+                a, b = random.Random(parent_id), random.Random(parent_id)
+                assert store.trope_index.select(parent_id, theme, a) == index.select(parent_id, theme, b)
+
+        engine = PopulationEngine(parents_by_id, tropes, mappings)
+        for per_cell_seed in (False, True):
+            expected = list(engine.iter_npcs(terrain, seed=2, per_cell_seed=per_cell_seed))
+            shared = store.engine().iter_npcs(store.terrain(sf_map_path), seed=2, per_cell_seed=per_cell_seed)
+            assert list(shared) == expected
+    finally:
+        store.close()
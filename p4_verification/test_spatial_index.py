@@ -0,0 +1,56 @@
+import json
+import random
+
+import pytest
+
+from p4_loaders.terrain_loader import TerrainLoader
+from p4_utils.terrain_utils import BiomeSpatialIndex
+
+
+@pytest.fixture(scope="module")
+def terrain(tmp_path_factory):
+    # sparse, off-origin map with few biomes so distance ties are common
+    rng = random.Random(4)
+    grid = [
+        {"x": x, "y": y, "geo_data": {"biome_code": rng.choice([10, 20, 30])}}
+        for y in range(-5, 32) for x in range(3, 45) if rng.random() < 0.6
+    ]
+    source = tmp_path_factory.mktemp("spatial") / "spatial.json"
+    source.write_text(json.dumps({"meta": {}, "grid": grid}))
+    return TerrainLoader().load_map(source)
+
+
+def _cells(terrain):
+    xs, ys = terrain.cell_coords()
+    # row-major, like the index's tie-break
+    return [(x, y, terrain.biome_code_at(x, y)) for x, y in zip(xs.tolist(), ys.tolist())]
+
+
+@pytest.mark.parametrize("tile_size", [1, 4, 16, 64])
+def test_nearest_cell_matches_brute_force(terrain, tile_size):
+    index = BiomeSpatialIndex(terrain, tile_size=tile_size)
+    cells = _cells(terrain)
+    rng = random.Random(tile_size)
+
+    for _ in range(300):
+        x, y = rng.randint(-10, 55), rng.randint(-15, 40)  # includes points off the map
+        for biome in (10, 20, 30, 99):
+            matches = [(cx, cy) for cx, cy, code in cells if code == biome]
+            expected = min(matches, key=lambda c: (c[0] - x) ** 2 + (c[1] - y) ** 2, default=None)
+            assert index.nearest_cell(biome, x, y) == expected
+
+
+def test_counts_in_box_match_brute_force(terrain):
+    index = BiomeSpatialIndex(terrain, tile_size=8)
+    cells = _cells(terrain)
+    rng = random.Random(1)
+
+    for _ in range(300):
+        x0, x1 = sorted(rng.randint(-5, 50) for _ in range(2))
+        y0, y1 = sorted(rng.randint(-10, 35) for _ in range(2))
+        expected = {}
+        for x, y, code in cells:
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                expected[code] = expected.get(code, 0) + 1
+        assert index.counts_in_box(x0, y0, x1, y1) == expected
+    assert index.counts_in_box(100, 100, 120, 120) == {}
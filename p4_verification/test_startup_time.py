@@ -0,0 +1,71 @@
+"""
+Startup regression checks based on `python -X importtime`.
+
+The CLI must stay cheap to start: importing main.py, or the modules the
+`generate` command needs, must not pull in the embedding stack.
+"""
+import subprocess
+import sys
+from pathlib import Path
+from typing import Set, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "p4_embeddings", "p4_mappers")
+
+GENERATE_IMPORTS = (
+    "main",
+    "p4_loaders.archetype_loader",
+    "p4_loaders.trope_loader",
+    "p4_loaders.terrain_loader",
+    "p4_generator.npc_generator",
+    "p4_generator.population",
+    "p4_utils.terrain_utils",
+)
+
+# Cumulative import time budget for the generate path (numpy dominates).
+GENERATE_IMPORT_BUDGET_US = 500_000
+
+
+def _importtime(*modules: str) -> Tuple[Set[str], int]:
+    """
+    Runs the imports in a fresh interpreter; returns the top-level packages
+    that got imported and the total import time in microseconds.
+    """
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    packages: Set[str] = set()
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        packages.add(name.strip().split(".")[0])
+        # Cumulative times nest; only the outermost entries add up.
+        if len(name) - len(name.lstrip()) == 1:
+            total += int(cumulative)
+    return packages, total
+
+
+def test_main_import_is_light():
+    imported, _ = _importtime("main")
+    for heavy in HEAVY_MODULES:
+        assert heavy not in imported, f"`import main` pulled in {heavy}"
+
+
+def test_generate_path_skips_embedding_stack():
+    imported, _ = _importtime(*GENERATE_IMPORTS)
+    for heavy in HEAVY_MODULES:
+        assert heavy not in imported, f"generate path pulled in {heavy}"
+
+
+def test_generate_path_import_budget():
+    _, total = _importtime(*GENERATE_IMPORTS)
+    assert total < GENERATE_IMPORT_BUDGET_US, f"generate path imports took {total / 1000:.0f} ms"
@@ -0,0 +1,153 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from p4_loaders.json_stream import iter_object_members
+from p4_loaders.terrain_cache import TerrainCache
+from p4_loaders.terrain_loader import TerrainColumnBuilder, TerrainLoader
+
+
+def test_unknown_fields_survive_load_and_cache(tmp_path):
+    source = tmp_path / "map.json"
+    source.write_text(json.dumps({
+        "meta": {},
+        "grid": [
+            {"x": 0, "y": 0, "geo_data": {"elevation": 1.5, "soil": "clay"},
+             "game_heuristics": {"buildable": True, "cover": 0.3}},
+            {"x": 1, "y": 0, "geo_data": {"elevation": 2.0}},
+        ],
+    }))
+
+    loaded = TerrainLoader(cache_dir=tmp_path / "cache").load_map(source)
+    for terrain in (loaded, TerrainCache(tmp_path / "cache").load(source)):
+        cell = terrain.get_cell(0, 0)
+        assert cell.geo_data == {"elevation": 1.5, "soil": "clay"}
+        assert cell.game_heuristics == {"buildable": True, "cover": 0.3}
+        assert terrain.get_cell(1, 0).geo_data == {"elevation": 2.0}
+
+
+def test_cache_skips_source_edited_during_parse(tmp_path):
+    source = tmp_path / "map.json"
+    source.write_text(json.dumps({"meta": {}, "grid": [{"x": 0, "y": 0, "geo_data": {"elevation": 1.0}}]}))
+    before = source.stat()
+    terrain = TerrainLoader().load_map(source)
+
+    # edited after the parse started, before the cache write
+    source.write_text(json.dumps({"meta": {}, "grid": [{"x": 0, "y": 0, "geo_data": {"elevation": 22.0}}]}))
+    cache = TerrainCache(tmp_path / "cache")
+    assert cache.store(source, terrain, source_stat=before) is None
+    assert cache.load(source) is None
+
+
+def test_concurrent_cache_writers(tmp_path):
+    source = tmp_path / "map.json"
+    source.write_text(json.dumps({"meta": {}, "grid": [{"x": x, "y": 0, "geo_data": {}} for x in range(50)]}))
+    terrain = TerrainLoader().load_map(source)
+    cache = TerrainCache(tmp_path / "cache")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: cache.store(source, terrain), range(16)))
+
+    entry = cache.entry_dir(source)
+    assert not list(entry.glob("*.tmp"))
+    assert np.array_equal(cache.load(source).present, terrain.present)
+
+
+def test_outlier_coordinates_are_rejected():
+    builder = TerrainColumnBuilder()
+    builder.add({"x": 0, "y": 0, "geo_data": {}})
+    builder.add({"x": 1_000_000, "y": 1_000_000, "geo_data": {}})
+    with pytest.raises(ValueError, match="bounding box"):
+        builder.build("outlier", {})
+
+
+CHUNK_SIZES = (1, 7, 4096)
+
+# numbers and escapes of every shape, so some straddle any buffer edge
+STREAM_DOC = json.dumps({
+    "grid": [
+        {"x": 0, "y": 0, "geo_data": {"elevation": -12.5e-3, "biome_code": 10, "note": "a \\\"quoted\\\" \\\\ path"}},
+        {"x": 1, "y": 0, "geo_data": {"elevation": 1234567890123, "label": "caf\u00e9 \ud83d\ude00 \t tab"}},
+        {"x": 0, "y": 1, "geo_data": {"elevation": 0.000001, "is_water": True, "biome_code": 80},
+         "game_heuristics": {"movement_cost": 1e308, "buildable": False}},
+        {"x": 1, "y": 1, "geo_data": None, "game_heuristics": [1, 2.5, [], {}]},
+    ],
+    "other": [1, -2, 3.25, "x,y]}", None],
+    "meta": {"project_name": "stream_test", "bbox": {"north": 70.25}},
+})
+
+
+def _collect(text, chunk_size, stream_keys=("grid",)):
+    out = {}
+    for key, is_item, value in iter_object_members(io.StringIO(text), stream_keys, chunk_size):
+        if is_item:
+            out.setdefault(key, []).append(value)
+        else:
+            out[key] = value
+    return out
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_stream_members_match_json_load(chunk_size):
+    doc = json.loads(STREAM_DOC)
+    for text in (STREAM_DOC, json.dumps(doc, indent=2), json.dumps(doc, ensure_ascii=False)):
+        assert _collect(text, chunk_size) == json.loads(text)
+    assert _collect('{"grid": [], "meta": {}}', chunk_size) == {"meta": {}}
+    assert _collect(" { } ", chunk_size) == {}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_streamed_map_matches_parsed_map(tmp_path, chunk_size):
+    # meta comes after the grid, so the latitude patch is applied to staged rows
+    source = tmp_path / "stream_test.json"
+    source.write_text(STREAM_DOC, encoding="utf-8")
+
+    parsed = TerrainLoader(stream_threshold=None).load_map(source)
+    streamed = TerrainLoader(stream_threshold=0, chunk_size=chunk_size).load_map(source)
+
+    assert streamed.name == parsed.name == "stream_test"
+    assert streamed.meta == parsed.meta
+    assert streamed.origin == parsed.origin
+    assert np.array_equal(streamed.present, parsed.present)
+    for name in parsed.columns:
+        assert np.array_equal(streamed.columns[name], parsed.columns[name], equal_nan=True)
+    assert streamed.extras == parsed.extras
+    assert streamed.get_cell(0, 0).geo_data["biome_code"] == 100
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_streamed_empty_grid(tmp_path, chunk_size):
+    source = tmp_path / "empty.json"
+    source.write_text('{"meta": {}, "grid": []}')
+
+    terrain = TerrainLoader(stream_threshold=0, chunk_size=chunk_size).load_map(source)
+    assert terrain.present.size == 0 and len(terrain.cells) == 0
+
+
+@pytest.mark.parametrize("chunk_size", (1, 7))
+def test_truncated_stream_raises(chunk_size):
+    for cut in range(len(STREAM_DOC)):
+        with pytest.raises(ValueError):
+            _collect(STREAM_DOC[:cut], chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("text", [
+    '[1, 2]',
+    '{"a" 1}',
+    '{"a": 1,}',
+    '{"a": 1 "b": 2}',
+    '{"grid": [1 2]}',
+    '{"grid": [1,]}',
+    '{"grid": [1, 2}',
+    '{1: 2}',
+    '{"a": tru}',
+    '{"a": 1} x',
+    '{"a": 1}}',
+])
+def test_malformed_stream_raises(chunk_size, text):
+    with pytest.raises(ValueError):
+        _collect(text, chunk_size)
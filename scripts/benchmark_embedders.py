@@ -0,0 +1,87 @@
+"""
+Compares embedding backends on the real catalog.
+
+For each backend: startup time, embedding throughput, and how often its
+mapping picks the same parent as the MiniLM reference (the committed
+config_archetypes_mapped.json, or a live MiniLM run with --live-minilm).
+
+    python -m scripts.benchmark_embedders [--live-minilm] [--repeat N]
+"""
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+from p4_config.paths import get_data_paths
+from p4_loaders.archetype_loader import ArchetypeLoader
+from p4_loaders.trope_loader import TropeLoader
+
+from p4_embeddings.backends import create_embedder
+from p4_mappers.archetype_mapper import ArchetypeMapper
+from p4_mappers.mapping_config import CHILD_TEXT_WEIGHTS
+from p4_mappers.mapping_text import parent_text, child_text
+
+
+def agreement(rows, reference):
+    ref = {r["child_id"]: r["resolved_parent_id"] for r in reference}
+    same = sum(1 for r in rows if ref.get(r["child_id"]) == r["resolved_parent_id"])
+    return same / max(1, len(rows))
+
+
+def bench(name, make, parents, tropes, reference, repeat):
+    t0 = time.perf_counter()
+    embedder = make()
+    texts = [parent_text(p) for p in parents] + [child_text(t) for t in tropes]
+    embedder.embed(texts[:1])
+    startup = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        embedder.embed(texts)
+    throughput = repeat * len(texts) / (time.perf_counter() - t0)
+
+    results = {}
+    for mode, weights in (("joined", None), ("weighted", CHILD_TEXT_WEIGHTS)):
+        mapper = ArchetypeMapper(embedder, field_weights=weights)
+        t0 = time.perf_counter()
+        rows = mapper.map_children_to_parents(parents, tropes)
+        results[mode] = (agreement(rows, reference), time.perf_counter() - t0)
+
+    print(
+        f"{name:<10} startup {startup:7.3f}s  {throughput:9.0f} texts/s  "
+        + "  ".join(
+            f"{mode}: agree {acc:6.1%} map {dt:6.2f}s"
+            for mode, (acc, dt) in results.items()
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live-minilm", action="store_true", help="benchmark MiniLM too and use it as reference")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    paths = get_data_paths()
+    parents = ArchetypeLoader().load(paths.parent_archetypes_path)
+    tropes = TropeLoader().load(paths.tropes_child_path)
+
+    reference_path = paths.project_root / "config_archetypes_mapped.json"
+    with Path(reference_path).open("r", encoding="utf-8") as f:
+        reference = json.load(f)
+
+    if args.live_minilm:
+        minilm = create_embedder("minilm")
+        reference = ArchetypeMapper(minilm).map_children_to_parents(parents, tropes)
+        bench("minilm", lambda: create_embedder("minilm"), parents, tropes, reference, args.repeat)
+
+    corpus = [parent_text(p) for p in parents] + [child_text(t) for t in tropes]
+    bench("hashing", lambda: create_embedder("hashing"), parents, tropes, reference, args.repeat)
+    bench("hash+idf", lambda: create_embedder("hashing", fit_texts=corpus), parents, tropes, reference, args.repeat)
+
+
+if __name__ == "__main__":
+    main()